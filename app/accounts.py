@@ -0,0 +1,108 @@
+"""
+BEAP accounts a client can submit under.
+
+BBG_CRED holds one credential or a list of them. Besides the credential
+keys, an entry may pin the catalog its requests go to with "catalog" (the
+first scheduled catalog of the account otherwise) and give its "weight", the
+share of the work it takes relative to the other entries (default 1), e.g.
+its licensed request budget.
+"""
+
+import threading
+
+ACCOUNT_KEYS = ("catalog", "weight")
+
+
+class Account:
+    def __init__(self, credential, catalog=None, weight=1):
+        """
+        Args:
+            credential (dict): BBG_CRED credential of the account.
+            catalog (str): Catalog identifier, or None for the scheduled one.
+            weight (float): Share of the work relative to other accounts.
+        """
+        if weight <= 0:
+            raise ValueError(f"Account weight must be positive, got {weight}")
+
+        self.credential = credential
+        self.catalog = catalog
+        self.weight = weight
+
+    @classmethod
+    def from_dict(cls, data):
+        credential = {k: v for k, v in data.items() if k not in ACCOUNT_KEYS}
+        return cls(credential, data.get("catalog"), data.get("weight", 1))
+
+    @property
+    def client_id(self):
+        return self.credential.get("client_id")
+
+    def to_dict(self):
+        """
+        Return the account as a single BBG_CRED entry.
+        """
+        data = dict(self.credential, weight=self.weight)
+        if self.catalog:
+            data["catalog"] = self.catalog
+        return data
+
+
+def parse(credential):
+    """
+    Return the accounts of a BBG_CRED value, a dict or a list of dicts.
+    """
+    entries = credential if isinstance(credential, list) else [credential]
+    if not entries:
+        raise ValueError("BBG_CRED has no credentials")
+    return [Account.from_dict(entry) for entry in entries]
+
+
+def split(items, weights):
+    """
+    Split items into len(weights) contiguous chunks sized in proportion to
+    weights, giving the rounding remainder to the largest fractions.
+    """
+    total = sum(weights)
+    exact = [len(items) * weight / total for weight in weights]
+    sizes = [int(share) for share in exact]
+    by_remainder = sorted(
+        range(len(weights)), key=lambda i: exact[i] - sizes[i], reverse=True
+    )
+    for i in by_remainder[: len(items) - sum(sizes)]:
+        sizes[i] += 1
+
+    chunks = []
+    start = 0
+    for size in sizes:
+        chunks.append(items[start : start + size])
+        start += size
+    return chunks
+
+
+class WeightedRotation:
+    """
+    Smooth weighted round robin over accounts: over many selections every
+    account is picked in proportion to its weight, without picking a heavy
+    account many times in a row.
+    """
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.current = [0.0] * len(accounts)
+        self.lock = threading.Lock()
+
+    def select(self, count=1):
+        """
+        Return count distinct accounts, the most overdue first.
+        """
+        count = min(count, len(self.accounts))
+        total = sum(account.weight for account in self.accounts)
+        with self.lock:
+            for i, account in enumerate(self.accounts):
+                self.current[i] += account.weight
+            order = sorted(
+                range(len(self.accounts)), key=lambda i: self.current[i], reverse=True
+            )[:count]
+            for i in order:
+                self.current[i] -= total / len(order)
+        return [self.accounts[i] for i in order]
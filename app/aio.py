@@ -0,0 +1,422 @@
+"""
+asyncio engine for BEAP resource calls.
+
+AsyncClient mirrors the blocking Client (universe, field list, request,
+listen, download) on top of aiohttp, so a single event loop can drive many
+concurrent submissions and downloads over a bounded connection pool:
+
+    async with AsyncClient(credential, config) as client:
+        frames = await asyncio.gather(*(client.submit(s) for s in shards))
+
+Requests are signed with the same JWT tokens as BEAPAdapter. ``host`` can
+point at a local stand-in server.
+"""
+
+import asyncio
+import contextlib
+import gzip
+import json
+import logging
+import os
+import time
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from app import accounts
+from app import payload as payload_encoder
+from app.metadata import MetadataCache
+from app.utils import Utils
+from beap.beap_auth import Credentials
+from beap.log_body import log_body
+from beap.sseclient import SSEEvent
+
+
+class AsyncClient:
+    HOST = "https://api.bloomberg.com"
+    API_VERSION = "2"
+    LISTENER_TIMEOUT_MIN = 45
+    MAX_REDIRECTS = 5
+    RETRY_ATTEMPTS = 3
+    RETRY_BACKOFF = 1
+    POLL_MIN_SEC = 15
+    POLL_MAX_SEC = 120
+    # Like the stream and download pools of the blocking Client: a stream
+    # without a heartbeat for a minute, or a download stalled for five, fails.
+    STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+    DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=300)
+
+    def __init__(self, credential, config, host=None, max_connections=20):
+        """
+        Args:
+            credential (dict or list): BBG_CRED credential. Of a list, only the
+                first account is used.
+            config (dict): App config.
+            host (str): API host, defaults to the Bloomberg API.
+            max_connections (int): Size of the connection pool.
+        """
+        self.config = config
+        self.host = host or self.HOST
+        self.max_connections = max_connections
+        self.log = logging.getLogger(__name__)
+        self.utils = Utils()
+        account = accounts.parse(credential)[0]
+        self.credential = Credentials.from_dict(account.credential)
+        self.metadata = MetadataCache()
+        self.session = None
+        self.catalog_id = account.catalog
+        self.account_url = None
+        self.waiters = {}
+        self.polls = {}
+        self.poll_wakeup = None
+        self.sse_task = None
+        self.poll_task = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        self.session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        self.poll_wakeup = asyncio.Event()
+        self.account_url = await self.get_catalog()
+        # Listen before anything is submitted, so no reply can be missed.
+        self._start_listener()
+
+    async def close(self):
+        for task in (self.sse_task, self.poll_task):
+            if task is not None:
+                task.cancel()
+        if self.session is not None:
+            await self.session.close()
+
+    async def _send(self, method, url, **kwargs):
+        """
+        Send a signed request, signing again on every redirect and retrying
+        429 responses with exponential back-off like BEAPAdapter.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        for attempt in range(self.RETRY_ATTEMPTS + 1):
+            target = url
+            for _ in range(self.MAX_REDIRECTS + 1):
+                parsed = urlparse(target)
+                headers["JWT"] = self.credential.generate_token(
+                    parsed.path, method, parsed.hostname
+                )
+                headers["api-version"] = self.API_VERSION
+                response = await self.session.request(
+                    method, target, headers=headers, allow_redirects=False, **kwargs
+                )
+                if response.status not in (301, 302, 303, 307, 308):
+                    break
+                target = urljoin(target, response.headers["Location"])
+                response.release()
+            else:
+                raise RuntimeError(f"Too many redirects for {url}")
+
+            if response.status != 429 or attempt == self.RETRY_ATTEMPTS:
+                return response
+
+            response.release()
+            await asyncio.sleep(self.RETRY_BACKOFF * 2**attempt)
+
+    async def get_catalog(self):
+        cache_key = f"catalog:{self.credential.client_id}"
+        self.catalog_id = self.catalog_id or self.metadata.get(cache_key)
+        if self.catalog_id is None:
+            url = urljoin(self.host, "/eap/catalogs/")
+            async with await self._send("GET", url) as response:
+                if response.status != 200:
+                    self.log.error(
+                        "Unexpected response status code: %s", response.status
+                    )
+                    raise RuntimeError("Unexpected response")
+
+                catalogs = (await response.json(content_type=None))["contains"]
+            for catalog in catalogs:
+                if catalog["subscriptionType"] == "scheduled":
+                    self.catalog_id = catalog["identifier"]
+                    break
+            else:
+                self.log.error("Scheduled catalog not in %r", catalogs)
+                raise RuntimeError("Scheduled catalog not found")
+            self.metadata.set(cache_key, self.catalog_id)
+
+        return urljoin(self.host, "/eap/catalogs/{c}/".format(c=self.catalog_id))
+
+    async def _post_resource(self, url, body):
+        headers = {"Content-Type": "application/json"}
+        if self.config.get("compress_uploads"):
+            body = payload_encoder.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        response = await self._send("POST", url, data=body, headers=headers)
+        response.release()
+        if response.status != 201:
+            self.log.error("Unexpected response status code: %s", response.status)
+            raise RuntimeError("Unexpected response")
+
+        return urljoin(self.host, response.headers["Location"])
+
+    def _resource(self, resource_type, identifier):
+        return {
+            "@type": resource_type,
+            "identifier": identifier,
+            "title": self.config["app_name"],
+            "description": self.config["description"],
+        }
+
+    async def create_universe(self, tickers, session_id):
+        identifier_type = "ISIN" if self.config.get("is_identifier_isin") else "TICKER"
+        body = payload_encoder.encode_resource(
+            self._resource("Universe", "u" + session_id),
+            payload_encoder.encode_identifiers(identifier_type, tickers),
+        )
+        log_body(self.log, logging.INFO, "Universe component payload:\n%s", body)
+        url = await self._post_resource(urljoin(self.account_url, "universes/"), body)
+        self.log.info("Universe successfully created at %s", url)
+        return url
+
+    async def create_field(self, fields, session_id):
+        body = payload_encoder.encode_resource(
+            self._resource("DataFieldList", "f" + session_id),
+            payload_encoder.encode_items(fields),
+        )
+        log_body(self.log, logging.INFO, "Field list component payload:\n%s", body)
+        url = await self._post_resource(urljoin(self.account_url, "fieldLists/"), body)
+        self.log.info("Field list successfully created at %s", url)
+        return url
+
+    async def request(
+        self, universe, field, session_id, request_type="DataRequest", **options
+    ):
+        request_id = "r" + session_id
+        payload = self._resource(request_type, request_id)
+        payload.update(
+            {
+                "universe": universe,
+                "fieldList": field,
+                "trigger": urljoin(self.account_url, "triggers/executeNow"),
+                "formatting": {
+                    "@type": "MediaType",
+                    "outputMediaType": "application/json",
+                },
+                "terminalIdentity": {
+                    "@type": "BlpTerminalIdentity",
+                    "userNumber": 29504171,
+                    "serialNumber": 271249,
+                    "workStation": 1,
+                },
+            }
+        )
+        payload.update(options)
+        log_body(self.log, logging.INFO, "Request component payload:\n%s", payload)
+        url = await self._post_resource(
+            urljoin(self.account_url, "requests/"), payload_encoder.dumps(payload)
+        )
+        self.log.info(
+            "%s resource has been successfully created at %s", request_id, url
+        )
+        return request_id
+
+    def _start_listener(self):
+        if self.sse_task is None or self.sse_task.done():
+            self.sse_task = asyncio.ensure_future(self._read_sse())
+
+    async def _read_sse(self):
+        """
+        Read the notification stream and resolve the waiter of every reply
+        delivered to our catalog.
+        """
+        url = urljoin(self.host, "/eap/notifications/sse")
+        headers = {"Cache-Control": "no-cache", "Accept": "text/event-stream"}
+        while True:
+            try:
+                response = await self._send(
+                    "GET", url, headers=headers, timeout=self.STREAM_TIMEOUT
+                )
+                async with response:
+                    response.raise_for_status()
+                    data = ""
+                    async for line in response.content:
+                        data += line.decode("utf-8")
+                        if data.endswith(("\r\r", "\n\n", "\r\n\r\n")):
+                            self._dispatch(SSEEvent(data))
+                            data = ""
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.log.exception("SSE listener failed, reconnecting")
+            await asyncio.sleep(3)
+
+    def _dispatch(self, event):
+        if event.is_heartbeat():
+            return
+
+        try:
+            distribution = json.loads(event.data)["generated"]
+            reply_url = distribution["@id"]
+            distribution_id = distribution["identifier"]
+            catalog = distribution["snapshot"]["dataset"]["catalog"]["identifier"]
+        except (KeyError, ValueError):
+            return
+
+        waiter = self.waiters.get(distribution_id)
+        if catalog == self.catalog_id and waiter is not None and not waiter.done():
+            waiter.set_result(("sse", reply_url))
+
+    def _start_poller(self):
+        if self.poll_task is None or self.poll_task.done():
+            self.poll_task = asyncio.ensure_future(self._poll())
+
+    async def _poll(self):
+        """
+        Poll the catalog's responses for every pending reply, in one task
+        shared by all listen() calls. Every reply is polled POLL_MIN_SEC after
+        it started waiting, backing off to POLL_MAX_SEC. The task ends when no
+        reply is pending.
+        """
+        loop = asyncio.get_running_loop()
+        while self.polls:
+            now = loop.time()
+            due = [d for d, (at, _) in self.polls.items() if at <= now]
+            for distribution_id in due:
+                interval = min(self.polls[distribution_id][1] * 1.5, self.POLL_MAX_SEC)
+                self.polls[distribution_id] = (now + interval, interval)
+            await asyncio.gather(*(self._poll_response(d) for d in due))
+
+            if self.polls:
+                delay = min(at for at, _ in self.polls.values()) - loop.time()
+                self.poll_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.poll_wakeup.wait(), max(delay, 0))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _poll_response(self, distribution_id):
+        responses_url = urljoin(self.account_url, "content/responses/")
+        request_id = distribution_id[: -len(".json")]
+        try:
+            response = await self._send(
+                "GET", responses_url, params={"requestIdentifier": request_id}
+            )
+            async with response:
+                contains = (await response.json(content_type=None)).get("contains", [])
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            self.log.warning("Polling responses failed: %r", err)
+            return
+
+        waiter = self.waiters.get(distribution_id)
+        if distribution_id in [r.get("key") for r in contains]:
+            self.polls.pop(distribution_id, None)
+            if waiter is not None and not waiter.done():
+                reply_url = urljoin(responses_url, distribution_id)
+                waiter.set_result(("poll", reply_url))
+
+    def _waiter(self, distribution_id):
+        """
+        Return the future resolved when distribution_id is delivered,
+        registering it if needed.
+        """
+        if distribution_id not in self.waiters:
+            self.waiters[distribution_id] = asyncio.get_running_loop().create_future()
+        return self.waiters[distribution_id]
+
+    async def listen(self, request_id, timeout=None):
+        """
+        Wait for the reply of request_id, from SSE or polling, whichever sees
+        it first, and download it.
+
+        Returns:
+            DataFrame: The parsed reply, or None if it was not delivered.
+        """
+        timeout = timeout or self.LISTENER_TIMEOUT_MIN * 60
+        distribution_id = "{}.json".format(request_id)
+        loop = asyncio.get_running_loop()
+        waiter = self._waiter(distribution_id)
+        self._start_listener()
+        if self.config.get("poll_responses", True):
+            interval = self.POLL_MIN_SEC
+            self.polls[distribution_id] = (loop.time() + interval, interval)
+            self.poll_wakeup.set()
+            self._start_poller()
+
+        try:
+            source, reply_url = await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            self.log.info("Reply NOT delivered, try to increase waiter loop timeout")
+            return None
+        finally:
+            self.waiters.pop(distribution_id, None)
+            self.polls.pop(distribution_id, None)
+
+        self.log.info(f"Reply {distribution_id} first seen by {source}")
+        path = await self.download(reply_url, distribution_id)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._parse_reply, path
+            )
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+    async def download(self, url, distribution_id, chunk_size=1 << 16):
+        """
+        Stream a distribution to the working directory, keeping the gzip
+        encoding as sent by the server.
+        """
+        out_path = os.path.join(os.path.abspath(os.getcwd()), distribution_id)
+        response = await self._send(
+            "GET",
+            url,
+            headers={"Accept-Encoding": "gzip"},
+            timeout=self.DOWNLOAD_TIMEOUT,
+        )
+        async with response:
+            response.raise_for_status()
+            if "gzip" in response.headers.get("Content-Encoding", ""):
+                out_path = "{out}.gz".format(out=out_path)
+
+            start = time.perf_counter()
+            with open(out_path, "wb") as out_file:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    out_file.write(chunk)
+        self.log.info(
+            f"File downloaded to: {out_path} in {time.perf_counter() - start:.1f}s"
+        )
+        return out_path
+
+    @staticmethod
+    def _parse_reply(path):
+        import pandas as pd
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            return pd.json_normalize(json.load(f))
+
+    async def submit(self, tickers, field=None, request_type="DataRequest", **options):
+        """
+        Create a universe for tickers, request it and wait for the reply.
+        """
+        session_id = self.utils.random_id()
+        universe = await self.create_universe(tickers, session_id)
+        # Expect the reply before requesting it, as SSE may deliver it before
+        # the request call returns.
+        distribution_id = "r{}.json".format(session_id)
+        self._waiter(distribution_id)
+        try:
+            request_id = await self.request(
+                universe,
+                field or self.config["field_url"],
+                session_id,
+                request_type,
+                **options,
+            )
+        except BaseException:
+            self.waiters.pop(distribution_id, None)
+            raise
+        return await self.listen(request_id)
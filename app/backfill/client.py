@@ -0,0 +1,168 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from app.checkpoint import Checkpoint
+from app.eod import client
+from app.identifiers import IdentifierStore
+
+
+class Client(client.Client):
+    """
+    Backfills history for a date range. The range is split into windows of
+    window_days, the tickers into shards, and every (window, shard) pair is
+    submitted as its own HistoryRequest by up to max_workers worker clients,
+    spread over the accounts of BBG_CRED by weight.
+    A window is loaded and checkpointed once all of its shards are back, so
+    an interrupted backfill resumes at the next window.
+    """
+
+    DATE_COLUMN = "DATE"
+    # A loaded window replaces the dates of the backfilled identifiers only.
+    REPLACE_ON = [DATE_COLUMN, client.Client.IDENTIFIER_COLUMN]
+
+    def __init__(self, credential, config):
+        super().__init__(credential, config)
+        self.backfill = config["backfill"]
+        self.checkpoint = Checkpoint(
+            self.utils.state_path(f"backfill_{config['output_table']}.json")
+        )
+        self.workers = threading.local()
+        self.worker_clients = []
+        self.submit_lock = threading.Lock()
+        self.last_submit = 0.0
+        self.window = None
+
+    def windows(self):
+        start = datetime.date.fromisoformat(self.backfill["start_date"])
+        end = datetime.date.fromisoformat(self.backfill["end_date"])
+        step = datetime.timedelta(days=self.backfill.get("window_days", 30))
+        while start <= end:
+            window_end = min(start + step - datetime.timedelta(days=1), end)
+            yield start.isoformat(), window_end.isoformat()
+            start = window_end + datetime.timedelta(days=1)
+
+    def shards(self, tickers):
+        count = max(1, min(self.backfill.get("shards", 1), len(tickers)))
+        size = -(-len(tickers) // count)
+        return [tickers[i : i + size] for i in range(0, len(tickers), size)]
+
+    def run(self, tickers):
+        state = self.checkpoint.load()
+        params = {
+            k: self.backfill.get(k) for k in ("start_date", "end_date", "window_days")
+        }
+        if state.get("params") != params:
+            state = {"params": params, "done": []}
+
+        self.identifiers = tickers if isinstance(tickers, IdentifierStore) else None
+        windows = [w for w in self.windows() if w[0] not in state["done"]]
+        shards = self.shards(tickers)
+        self.log.info(
+            f"Backfilling {len(windows)} windows x {len(shards)} shards, "
+            f"{len(state['done'])} windows already done"
+        )
+
+        pending = {window: [] for window in windows}
+        with ThreadPoolExecutor(self.backfill.get("max_workers", 4)) as executor:
+            futures = {
+                executor.submit(self._fetch, window, shard): window
+                for window in windows
+                for shard in shards
+            }
+            try:
+                for future in as_completed(futures):
+                    window = futures[future]
+                    pending[window].append(future.result())
+                    if len(pending[window]) < len(shards):
+                        continue
+
+                    self._load_window(window, pending.pop(window))
+                    state["done"].append(window[0])
+                    self.checkpoint.save(state)
+            except BaseException:
+                # Do not wait for the queued submissions of a failed backfill;
+                # a rerun resumes at the first window that was not loaded.
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            finally:
+                self._close_workers()
+
+        self.log.info("Backfill complete")
+        return True
+
+    def _worker(self):
+        worker = getattr(self.workers, "client", None)
+        if worker is None:
+            account = self.rotation.select()[0]
+            worker = client.Client(account.to_dict(), self.config)
+            self.workers.client = worker
+            with self.submit_lock:
+                self.worker_clients.append(worker)
+        else:
+            worker.new_run()
+        return worker
+
+    def _close_workers(self):
+        """
+        Close the worker clients of this run, which each hold an SSE
+        connection, HTTP sessions and background threads.
+        """
+        with self.submit_lock:
+            workers, self.worker_clients = self.worker_clients, []
+            self.workers = threading.local()
+        for worker in workers:
+            worker.close()
+
+    def _throttle(self):
+        interval = self.backfill.get("min_submit_interval_sec", 1)
+        with self.submit_lock:
+            wait = self.last_submit + interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_submit = time.monotonic()
+
+    def _fetch(self, window, shard):
+        start_date, end_date = window
+        worker = self._worker()
+        self._throttle()
+        universe = worker.create_universe(shard)
+        worker.request(
+            universe,
+            self.config["field_url"],
+            worker.get_trigger(),
+            "HistoryRequest",
+            runtimeOptions={
+                "@type": "HistoryRuntimeOptions",
+                "dateRange": {
+                    "@type": "IntervalDateRange",
+                    "startDate": start_date,
+                    "endDate": end_date,
+                },
+            },
+        )
+        worker.listen()
+        if not worker.status:
+            raise RuntimeError(f"History reply for {start_date}..{end_date} not found")
+        return worker.dataframe
+
+    def run_key(self):
+        start_date, end_date = self.window
+        return f"{self.config['app_name']}_{start_date}_{end_date}".replace("-", "")
+
+    def _load_window(self, window, frames):
+        self.window = window
+        self.dataframe = pd.concat(frames, ignore_index=True)
+        self.status = True
+        self.join_input_attributes()
+        self.log.info(
+            f"Loading {len(self.dataframe)} rows for {window[0]}..{window[1]}"
+        )
+        self.save()
+
+    def _process_dataframe(self):
+        self._remove_unnecessary_columns()
+        self.dataframe["timestamp_created_utc"] = datetime.datetime.utcnow()
@@ -1,18 +1,33 @@
+import contextlib
 import datetime
 import gzip
 import json
 import logging
 import os
-import pprint
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
-import pandas as pd
 import requests
 
+from app import accounts
+from app import payload as payload_encoder
+from app import sinks
+from app.identifiers import IdentifierStore
+from app.metadata import MetadataCache
+from app.stats import TurnaroundStore
 from app.utils import Utils
-from beap.beap_auth import BEAPAdapter, Credentials, download
+from beap.beap_auth import (
+    JWT_POOL_SIZE,
+    BEAPAdapter,
+    Credentials,
+    TokenPool,
+    download,
+)
+from beap.log_body import log_body
 from beap.sseclient import SSEClient
-from db import mssql
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,13 +38,29 @@ logging.basicConfig(
 class Client:
     HOST = "https://api.bloomberg.com"
     LISTENER_TIMEOUT_MIN = 45
+    UPLOAD_COMPRESS_LEVEL = 6
+    POLL_MIN_SEC = 15
+    POLL_MAX_SEC = 120
+    IDENTIFIER_COLUMN = "IDENTIFIER"
+    RETURN_CODE_COLUMN = "RC"
+    REPLACE_ON = None
+    # Connection pools per kind of traffic: the SSE stream, control-plane
+    # calls and reply downloads. Overridden per key by the http_pools config.
+    # The SSE server sends a heartbeat about every 30 seconds, so a stream
+    # silent for twice as long has stalled and is reconnected.
+    HTTP_POOLS = {
+        "stream": {"pool_maxsize": 1, "connect_timeout": 10, "read_timeout": 60},
+        "api": {"pool_maxsize": 10, "connect_timeout": 10, "read_timeout": 60},
+        "download": {"pool_maxsize": 4, "connect_timeout": 10, "read_timeout": 300},
+    }
 
     def __init__(self, credential, config):
         """
         Initialize the Client class.
 
         Args:
-            credential (str): Path to the credential file.
+            credential (dict or list): BBG_CRED credential, or a list of them
+                to distribute the work over (see app.accounts).
         """
         self.status = False
         self.dataframe = None
@@ -37,24 +68,246 @@ class Client:
         self.log = logging.getLogger(__name__)
         self.utils = Utils()
         self.session_id = self.utils.random_id()
-        self.credential = Credentials.from_dict(credential)
+        self.accounts = accounts.parse(credential)
+        self.rotation = accounts.WeightedRotation(self.accounts)
+        self.peers = {}
+        self.catalog = self.accounts[0].catalog
+        self.credential = Credentials.from_dict(self.accounts[0].credential)
+        self.metadata = MetadataCache()
+        self.turnaround = TurnaroundStore()
+        self.universe_size = None
+        self.identifiers = None
+        self.requested_at = None
+        self.notifications = queue.Queue()
+        self.listening = threading.Event()
+        self.sse_thread = None
+        self.sse_client = None
+        self.closed = threading.Event()
         self.initialize_sse_client()
 
     def initialize_sse_client(self):
         """
-        Initialize the SSEClient for listening to events.
+        Initialize the sessions of every traffic kind and the SSEClient for
+        listening to events.
         """
-        self.adapter = BEAPAdapter(self.credential)
-        self.session = requests.Session()
-        self.session.mount("https://", self.adapter)
+        token_pool = TokenPool(self.credential) if JWT_POOL_SIZE else None
+        self.adapters = {}
+        self.sessions = {}
+        for name, settings in self.HTTP_POOLS.items():
+            settings = dict(settings, **self.config.get("http_pools", {}).get(name, {}))
+            self.adapters[name] = BEAPAdapter(
+                self.credential,
+                token_pool=token_pool,
+                name=name,
+                timeout=(settings["connect_timeout"], settings["read_timeout"]),
+                keep_alive=settings.get("keep_alive", True),
+                pool_connections=settings.get("pool_connections", 10),
+                pool_maxsize=settings["pool_maxsize"],
+                pool_block=settings.get("pool_block", False),
+            )
+            self.sessions[name] = requests.Session()
+            self.sessions[name].mount("https://", self.adapters[name])
+
+        self.adapter = self.adapters["api"]
+        self.session = self.sessions["api"]
         try:
             self.sse_client = SSEClient(
-                urljoin(self.HOST, "/eap/notifications/sse"), self.session
+                urljoin(self.HOST, "/eap/notifications/sse"), self.sessions["stream"]
             )
             self.account_url = self.get_catalog()
         except requests.exceptions.HTTPError as err:
             self.log.error(err)
 
+    def new_run(self):
+        """
+        Reset per-run state so the client, its session and SSE connection can
+        be reused for another run.
+        """
+        self.status = False
+        self.dataframe = None
+        self.requested_at = None
+        self.session_id = self.utils.random_id()
+
+    def close(self):
+        """
+        Stop the SSE pump and close the SSE connection, the HTTP sessions and
+        the token pool of this client and of its peers.
+        """
+        self.closed.set()
+        for peer in self.peers.values():
+            peer.close()
+        if self.sse_client is not None:
+            self.sse_client.close()
+        for session in self.sessions.values():
+            session.close()
+
+    def run(self, tickers):
+        """
+        Create the universe for the given tickers, submit the request, wait
+        for the reply and save it.
+        """
+        self.fetch(tickers)
+        self._log_pool_stats()
+        return self.save()
+
+    def fetch(self, tickers):
+        """
+        Fetch the tickers under one or more accounts, merge the replies into
+        self.dataframe and join the input attributes of an IdentifierStore
+        onto them.
+        """
+        self.identifiers = tickers if isinstance(tickers, IdentifierStore) else None
+        shares = self.distribute(tickers)
+        if not shares or (len(shares) == 1 and shares[0][0] is self):
+            self._fetch_share(tickers)
+        else:
+            self._fetch_shares(shares)
+
+        self.join_input_attributes()
+        return self.dataframe
+
+    def _fetch_shares(self, shares):
+        for peer, _ in shares:
+            if peer is not self:
+                peer.new_run()
+
+        with ThreadPoolExecutor(len(shares)) as executor:
+            list(executor.map(lambda share: share[0]._fetch_share(share[1]), shares))
+
+        import pandas as pd
+
+        failed = [peer.credential.client_id for peer, _ in shares if not peer.status]
+        if failed:
+            self.log.error(f"Reply NOT delivered for accounts {', '.join(failed)}")
+            self.status = False
+            return
+
+        self.dataframe = pd.concat(
+            [peer.dataframe for peer, _ in shares], ignore_index=True
+        )
+        self.status = True
+
+    def join_input_attributes(self):
+        """
+        Add the input columns kept with the identifiers to the reply rows, so
+        the output carries them without joining the input table again.
+        """
+        if not self.status or self.identifiers is None:
+            return
+
+        self.identifiers.join(self.dataframe, self.IDENTIFIER_COLUMN)
+
+    def distribute(self, tickers):
+        """
+        Split the tickers over the accounts as (client, tickers) pairs. A
+        universe gets one account per distribution.min_shard_size tickers,
+        picked by weighted rotation so consecutive runs also spread over all
+        accounts, and each picked account a share in proportion to its weight.
+        """
+        min_size = self.config.get("distribution", {}).get("min_shard_size", 1000)
+        count = max(1, min(len(self.accounts), len(tickers) // min_size))
+        # In account order, so the same accounts get the same shares and can
+        # reuse their universes, e.g. across intraday cycles.
+        picked = sorted(self.rotation.select(count), key=self.accounts.index)
+        chunks = accounts.split(tickers, [account.weight for account in picked])
+        return [
+            (self.peer(account), chunk)
+            for account, chunk in zip(picked, chunks)
+            if len(chunk)
+        ]
+
+    def peer(self, account):
+        """
+        Return the client submitting under account, created on first use.
+        """
+        if account is self.accounts[0]:
+            return self
+
+        key = (account.client_id, account.catalog)
+        if key not in self.peers:
+            self.peers[key] = self._new_peer(account)
+        return self.peers[key]
+
+    def _new_peer(self, account):
+        return type(self)(account.to_dict(), self.config)
+
+    def _fetch_share(self, tickers):
+        """
+        Create the universe for the given tickers, submit the request and wait
+        for the reply, re-requesting failed identifiers.
+        """
+        universe = self.create_universe(tickers)
+        field = self.config["field_url"]
+        trigger = self.get_trigger()
+        self.request(universe, field, trigger)
+        self.listen()
+        self.retry_failed(field, trigger)
+        return self.dataframe
+
+    def failed_identifiers(self):
+        """
+        Return the identifiers worth requesting again: reply rows whose return
+        code is in retry_failed.return_codes (transient errors), and rows
+        without a return code error that have no field value. Other non-zero
+        return codes, e.g. an unknown security, are permanent and not retried.
+        """
+        import pandas as pd
+
+        df = self.dataframe
+        retryable = self.config.get("retry_failed", {}).get("return_codes", [])
+        codes = pd.Series(0, index=df.index)
+        if self.RETURN_CODE_COLUMN in df.columns:
+            codes = pd.to_numeric(df[self.RETURN_CODE_COLUMN], errors="coerce")
+            codes = codes.fillna(0)
+        failed = codes.isin(retryable)
+
+        bookkeeping = set(self.config["delete_columns"])
+        bookkeeping.update((self.IDENTIFIER_COLUMN, self.RETURN_CODE_COLUMN))
+        fields = [c for c in df.columns if c not in bookkeeping]
+        if fields:
+            blank = df[fields].isna()
+            for column in df[fields].select_dtypes(include="object").columns:
+                blank[column] |= df[column].astype(str).str.strip().eq("")
+            failed |= blank.all(axis=1) & codes.eq(0)
+
+        return df.loc[failed, self.IDENTIFIER_COLUMN].dropna().unique().tolist()
+
+    def retry_failed(self, field, trigger):
+        """
+        Re-request only the identifiers that failed, up to retry_failed.attempts
+        times, and merge the recovered rows into the reply.
+        """
+        attempts = self.config.get("retry_failed", {}).get("attempts", 0)
+        if not self.status or not attempts:
+            return
+
+        import pandas as pd
+
+        reply = self.dataframe
+        for attempt in range(1, attempts + 1):
+            failed = self.failed_identifiers()
+            if not failed:
+                break
+
+            self.log.info(
+                f"Re-requesting {len(failed)} failed identifiers "
+                f"(attempt {attempt}/{attempts})"
+            )
+            self.new_run()
+            universe = self.create_universe(failed)
+            self.request(universe, field, trigger)
+            self.listen()
+            if not self.status:
+                break
+
+            retried = self.dataframe
+            keep = ~reply[self.IDENTIFIER_COLUMN].isin(retried[self.IDENTIFIER_COLUMN])
+            reply = pd.concat([reply[keep], retried], ignore_index=True)
+            self.dataframe = reply
+
+        self.dataframe = reply
+        self.status = True
+
     def listen(self, file=None):
         """
         Listen to events from the Bloomberg API and process them.
@@ -62,18 +315,113 @@ class Client:
         if file:
             self.log.info("Reply was downloaded")
             self.log.info("Prasing the downloaded json")
-            with gzip.open(file + ".gz", "rt", encoding="utf-8") as f:
-                json_data = json.load(f)
-
-            self.dataframe = pd.json_normalize(json_data)
+            self.dataframe = self.parse_reply(file + ".gz")
             self.status = True
             return self.dataframe
 
         request_id = "r" + self.session_id
-        reply_timeout = datetime.timedelta(minutes=self.LISTENER_TIMEOUT_MIN)
-        expiration_timestamp = datetime.datetime.utcnow() + reply_timeout
-        while datetime.datetime.utcnow() < expiration_timestamp:
-            event = self.sse_client.read_event()
+        requested_at = self.requested_at or time.time()
+        timeout, expected = self.turnaround.deadline(
+            self.stats_key(), self.universe_size, self.LISTENER_TIMEOUT_MIN * 60
+        )
+        if expected is not None:
+            self.log.info(
+                f"Reply expected in ~{expected / 60:.1f}m (p50), "
+                f"waiting up to {timeout / 60:.1f}m"
+            )
+        expiration_timestamp = requested_at + timeout
+        self.listening.set()
+        self._start_sse_pump()
+        poller = None
+        if self.config.get("poll_responses", True):
+            poller = threading.Event()
+            threading.Thread(
+                target=self._poll_responses,
+                args=(request_id, requested_at, expected, poller),
+                daemon=True,
+            ).start()
+
+        try:
+            while time.time() < expiration_timestamp:
+                try:
+                    source, distribution_id, reply_url = self.notifications.get(
+                        timeout=min(max(expiration_timestamp - time.time(), 0), 5)
+                    )
+                except queue.Empty:
+                    continue
+
+                if "{}.json".format(request_id) != distribution_id:
+                    self.log.info("Some other delivery occurred - continue waiting")
+                    continue
+
+                self.log.info(f"Reply {distribution_id} first seen by {source}")
+                if poller is not None:
+                    poller.set()
+
+                self._download_reply(distribution_id, reply_url)
+                self._record_turnaround(requested_at, True)
+                return self.dataframe
+            else:
+                self.log.info(
+                    "Reply NOT delivered, try to increase waiter loop timeout"
+                )
+                self._record_turnaround(requested_at, False)
+        finally:
+            self.listening.clear()
+            if poller is not None:
+                poller.set()
+
+    def _download_reply(self, distribution_id, reply_url):
+        output_file_path = os.path.join(os.path.abspath(os.getcwd()), distribution_id)
+
+        headers = {"Accept-Encoding": "gzip"}
+        download(
+            self.sessions["download"], reply_url, output_file_path, headers=headers
+        )
+        self.log.info("Reply was downloaded")
+        self.log.info("Prasing the downloaded json")
+        try:
+            self.dataframe = self.parse_reply(output_file_path + ".gz")
+        finally:
+            # Long-running modes download a reply every run, don't keep them.
+            with contextlib.suppress(OSError):
+                os.remove(output_file_path + ".gz")
+        self.status = True
+
+    @staticmethod
+    def parse_reply(path):
+        """
+        Return the DataFrame of a downloaded gzipped JSON reply.
+        """
+        import pandas as pd
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            json_data = json.load(f)
+
+        return pd.json_normalize(json_data)
+
+    def _start_sse_pump(self):
+        """
+        Read SSE events on a background thread for the lifetime of the client
+        and queue reply notifications of our catalog while a request is
+        waiting for its reply.
+        """
+        if self.sse_thread is not None and self.sse_thread.is_alive():
+            return
+
+        self.sse_thread = threading.Thread(target=self._pump_sse, daemon=True)
+        self.sse_thread.start()
+
+    def _pump_sse(self):
+        while not self.closed.is_set():
+            try:
+                event = self.sse_client.read_event()
+            except Exception:
+                if self.closed.is_set():
+                    return
+                self.log.exception("SSE listener failed, reconnecting")
+                time.sleep(self.sse_client.retry_interval)
+                continue
 
             if event.is_heartbeat():
                 self.log.info("Received heartbeat event, keep waiting for events")
@@ -91,36 +439,93 @@ class Client:
                 reply_catalog_id = catalog["identifier"]
             except KeyError:
                 self.log.info("Received other event type, continue waiting")
+                continue
+
+            if reply_catalog_id != self.catalog_id:
+                self.log.info("Some other delivery occurred - continue waiting")
+                continue
+
+            if not self.listening.is_set():
+                self.log.info("No request is waiting - dropping %s", distribution_id)
+                continue
+
+            self.notifications.put(("sse", distribution_id, reply_url))
+
+    def _poll_responses(self, request_id, requested_at, expected, stop):
+        """
+        Poll the catalog's responses for the reply until it shows up or stop
+        is set. Polls sparsely until the expected delivery time, then every
+        POLL_MIN_SEC, backing off to POLL_MAX_SEC.
+        """
+        responses_url = urljoin(self.account_url, "content/responses/")
+        distribution_id = "{}.json".format(request_id)
+        interval = self.POLL_MIN_SEC
+        while True:
+            elapsed = time.time() - requested_at
+            if expected is not None and elapsed < expected:
+                interval = (expected - elapsed) / 2
             else:
-                is_required_reply = "{}.json".format(request_id) == distribution_id
-                is_same_catalog = reply_catalog_id == self.catalog_id
+                interval = interval * 1.5
+            interval = min(max(interval, self.POLL_MIN_SEC), self.POLL_MAX_SEC)
 
-                if not is_required_reply or not is_same_catalog:
-                    self.log.info("Some other delivery occurred - continue waiting")
-                    continue
+            if stop.wait(interval):
+                return
 
-                output_file_path = os.path.join(
-                    os.path.abspath(os.getcwd()), distribution_id
+            try:
+                response = self.session.get(
+                    responses_url, params={"requestIdentifier": request_id}
                 )
+                response.raise_for_status()
+                keys = [r["key"] for r in response.json().get("contains", [])]
+            except (requests.RequestException, ValueError, KeyError) as err:
+                self.log.warning("Polling responses failed: %s", err)
+                continue
 
-                headers = {"Accept-Encoding": "gzip"}
-                download_response = download(
-                    self.session, reply_url, output_file_path, headers=headers
-                )
-                self.log.info("Reply was downloaded")
-                self.log.info("Prasing the downloaded json")
-                with gzip.open(output_file_path + ".gz", "rt", encoding="utf-8") as f:
-                    json_data = json.load(f)
+            if distribution_id in keys:
+                reply_url = urljoin(responses_url, distribution_id)
+                self.notifications.put(("poll", distribution_id, reply_url))
+                return
 
-                self.dataframe = pd.json_normalize(json_data)
-                self.status = True
-                return self.dataframe
-        else:
-            self.log.info("Reply NOT delivered, try to increase waiter loop timeout")
+    def pool_stats(self):
+        """
+        Return the connection reuse and wait time of every HTTP pool.
+        """
+        return {
+            name: adapter.stats.snapshot() for name, adapter in self.adapters.items()
+        }
+
+    def _log_pool_stats(self):
+        for name, stats in self.pool_stats().items():
+            if not stats["checkouts"]:
+                continue
+            self.log.info(
+                f"HTTP pool {name}: {stats['checkouts']} requests, "
+                f"{stats['reuse_ratio']:.0%} on reused connections, "
+                f"max wait {stats['max_wait_seconds']:.3f}s"
+            )
 
-    def request(self, universe, field, trigger):
+    def run_key(self):
+        """
+        Identifier of the data a run saves, the app and as-of date, which
+        stays the same when a failed run is started again.
+        """
+        as_of = datetime.datetime.utcnow().strftime("%Y%m%d")
+        return f"{self.config['app_name']}_{as_of}"
+
+    def stats_key(self):
+        return f"{self.config['app_name']}:{self.config['output_table']}"
+
+    def _record_turnaround(self, requested_at, delivered):
+        latency = time.time() - requested_at
+        if delivered:
+            self.log.info(f"Reply delivered {latency / 60:.1f}m after the request")
+        self.turnaround.record(
+            self.stats_key(), self.universe_size, requested_at, latency, delivered
+        )
+
+    def request(self, universe, field, trigger, request_type="DataRequest", **options):
         payload = {
-            "@type": "DataRequest",
+            "@type": request_type,
             "identifier": None,
             "title": self.config["app_name"],
             "description": self.config["description"],
@@ -138,6 +543,7 @@ class Client:
                 "workStation": 1,
             },
         }
+        payload.update(options)
         return self._request(payload)
 
     def _request(self, payload):
@@ -146,16 +552,12 @@ class Client:
         """
         request_id = f"r{self.session_id}"
         payload["identifier"] = request_id
-        self.log.info("Request component payload:\n%s", pprint.pformat(payload))
+        # Queue notifications from now on, the reply may beat listen().
+        self.listening.set()
+        log_body(self.log, logging.INFO, "Request component payload:\n%s", payload)
         requests_url = urljoin(self.account_url, "requests/")
-        response = self.session.post(requests_url, json=payload)
-
-        if response.status_code != requests.codes.created:
-            self.log.error("Unexpected response status code: %s", response.status_code)
-            raise RuntimeError("Unexpected response")
-
-        request_location = response.headers["Location"]
-        request_url = urljoin(self.HOST, request_location)
+        request_url = self._post_resource(requests_url, payload_encoder.dumps(payload))
+        self.requested_at = time.time()
 
         self.log.info(
             "%s resource has been successfully created at %s", request_id, request_url
@@ -168,6 +570,21 @@ class Client:
         return trigger_url
 
     def get_catalog(self):
+        cache_key = f"catalog:{self.credential.client_id}"
+        self.catalog_id = self.catalog or self.metadata.get(cache_key)
+        if self.catalog_id is None:
+            self.catalog_id = self._find_scheduled_catalog()
+            self.metadata.set(cache_key, self.catalog_id)
+        elif self.catalog:
+            self.log.info("Using configured catalog %s", self.catalog_id)
+        else:
+            self.log.info("Using cached scheduled catalog %s", self.catalog_id)
+
+        account_url = urljoin(self.HOST, "/eap/catalogs/{c}/".format(c=self.catalog_id))
+        self.log.info("Scheduled catalog URL: %s", account_url)
+        return account_url
+
+    def _find_scheduled_catalog(self):
         catalogs_url = urljoin(self.HOST, "/eap/catalogs/")
         response = self.session.get(catalogs_url)
 
@@ -178,45 +595,102 @@ class Client:
         catalogs = response.json()["contains"]
         for catalog in catalogs:
             if catalog["subscriptionType"] == "scheduled":
-                self.catalog_id = catalog["identifier"]
-                break
-        else:
-            self.log.error("Scheduled catalog not in %r", response.json()["contains"])
-            raise RuntimeError("Scheduled catalog not found")
+                return catalog["identifier"]
 
-        account_url = urljoin(self.HOST, "/eap/catalogs/{c}/".format(c=self.catalog_id))
-        self.log.info("Scheduled catalog URL: %s", account_url)
-        return account_url
+        self.log.error("Scheduled catalog not in %r", catalogs)
+        raise RuntimeError("Scheduled catalog not found")
+
+    def field_types(self):
+        """
+        Return the Bloomberg datatype of every field in the app's field list
+        as a {mnemonic: datatype} dict, served from the metadata cache when
+        it is fresh.
+        """
+        field_url = self.config["field_url"]
+        cache_key = f"fields:{field_url}"
+        types = self.metadata.get(cache_key)
+        if types is None:
+            types = self._fetch_field_types(field_url)
+            self.metadata.set(cache_key, types)
+        return types
+
+    def _fetch_field_types(self, field_url):
+        response = self.session.get(field_url)
+        if not response.ok:
+            self.log.error("Unexpected response status code: %s", response.status_code)
+            raise RuntimeError("Unexpected response")
+
+        types = {}
+        for field in response.json().get("contains", []):
+            datatype = field.get("type")
+            if datatype is None and "@id" in field:
+                field_response = self.session.get(urljoin(self.HOST, field["@id"]))
+                if field_response.ok:
+                    details = field_response.json()
+                    field.setdefault("mnemonic", details.get("mnemonic"))
+                    datatype = details.get("type")
+
+            if isinstance(datatype, dict):
+                datatype = datatype.get("identifier") or datatype.get("@id")
+
+            if field.get("mnemonic"):
+                types[field["mnemonic"]] = datatype
+
+        self.log.info("Loaded %s field definitions from %s", len(types), field_url)
+        return types
 
     def create_universe(self, tickers):
         """
         Create a universe with the given title and tickers.
         """
-        tickers = self.parse_tickers(tickers)
+        contains = self.encode_identifier_values(tickers)
+        self.universe_size = len(tickers)
         universe_id = "u" + self.session_id
         universe_payload = {
             "@type": "Universe",
             "identifier": universe_id,
             "title": self.config["app_name"],
             "description": self.config["description"],
-            "contains": tickers,
         }
 
-        self.log.info(
-            "Universe component payload:\n:%s", pprint.pformat(universe_payload)
-        )
+        body = payload_encoder.encode_resource(universe_payload, contains)
+        log_body(self.log, logging.INFO, "Universe component payload:\n%s", body)
 
         universes_url = urljoin(self.account_url, "universes/")
-        response = self.session.post(universes_url, json=universe_payload)
+        universe_url = self._post_resource(universes_url, body)
+        self.log.info("Universe successfully created at %s", universe_url)
+        return universe_url
+
+    def _post_resource(self, url, body):
+        """
+        Post an encoded resource payload and return the created resource URL.
+
+        The body is gzip-compressed when "compress_uploads" is enabled in the
+        app config. Upload time and bytes saved are logged.
+        """
+        headers = {"Content-Type": "application/json"}
+        raw_size = len(body)
+        if self.config.get("compress_uploads"):
+            body = payload_encoder.compress(body, self.UPLOAD_COMPRESS_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+
+        start = time.perf_counter()
+        response = self.session.post(url, data=body, headers=headers)
+        elapsed = time.perf_counter() - start
+
+        self.log.info(
+            "Uploaded %s bytes (%s raw, %s saved) in %.3fs",
+            len(body),
+            raw_size,
+            raw_size - len(body),
+            elapsed,
+        )
 
         if response.status_code != requests.codes.created:
             self.log.error("Unexpected response status code: %s", response.status_code)
             raise RuntimeError("Unexpected response")
 
-        universe_location = response.headers["Location"]
-        universe_url = urljoin(self.HOST, universe_location)
-        self.log.info("Universe successfully created at %s", universe_url)
-        return universe_url
+        return urljoin(self.HOST, response.headers["Location"])
 
     def save(self):
         if not self.status or not len(self.dataframe):
@@ -224,17 +698,45 @@ class Client:
             return False
 
         self._process_dataframe()
-        self._save_dataframe_to_database()
+        self._save_dataframe_to_sinks()
         return True
 
+    def transform(self):
+        """
+        Apply the app's transforms to dataframe in place, as save() does
+        before writing to the sinks, and return it.
+        """
+        self._process_dataframe()
+        return self.dataframe
+
     def _process_dataframe(self):
         pass
 
-    def _save_dataframe_to_database(self):
-        table = self.config["output_table"]
-        self.log.info(f"Inserting data to {table}")
-        conn = mssql.MSSQLDatabase()
-        conn.insert_table(self.dataframe, table)
+    def _save_dataframe_to_sinks(self):
+        results = sinks.write_all(sinks.build_sinks(self), self.dataframe)
+        for result in results:
+            if result["ok"]:
+                self.log.info(
+                    f"Wrote {result['rows']} rows to {result['sink']} "
+                    f"in {result['seconds']:.2f}s"
+                )
+            else:
+                self.log.error(f"Writing to {result['sink']} failed: {result['error']}")
+
+        failed = [r["sink"] for r in results if not r["ok"]]
+        if failed:
+            raise RuntimeError(f"Writing to {', '.join(failed)} failed")
+        return results
+
+    def safe_field_types(self):
+        """
+        Return field_types, or None when the field definitions can't be loaded.
+        """
+        try:
+            return self.field_types()
+        except (RuntimeError, requests.RequestException) as err:
+            self.log.warning("Field definitions unavailable: %s", err)
+            return None
 
     def create_field(self, fields):
         fieldlist_id = "f" + self.session_id
@@ -243,22 +745,15 @@ class Client:
             "identifier": fieldlist_id,
             "title": self.config["app_name"],
             "description": self.config["description"],
-            "contains": fields,
         }
 
-        self.log.info(
-            "Field list component payload:\n %s", pprint.pformat(fieldlist_payload)
+        body = payload_encoder.encode_resource(
+            fieldlist_payload, payload_encoder.encode_items(fields)
         )
+        log_body(self.log, logging.INFO, "Field list component payload:\n%s", body)
 
         fieldlists_url = urljoin(self.account_url, "fieldLists/")
-        response = self.session.post(fieldlists_url, json=fieldlist_payload)
-
-        if response.status_code != requests.codes.created:
-            self.log.error("Unexpected response status code: %s", response.status_code)
-            raise RuntimeError("Unexpected response")
-
-        fieldlist_location = response.headers["Location"]
-        fieldlist_url = urljoin(self.HOST, fieldlist_location)
+        fieldlist_url = self._post_resource(fieldlists_url, body)
         self.log.info("Field list successfully created at %s", fieldlist_url)
         return fieldlist_url
 
@@ -273,3 +768,9 @@ class Client:
 
     def parse_tickers(self, tickers):
         return self.generate_identifier_values(tickers)
+
+    def encode_identifier_values(self, tickers):
+        """
+        Encode the universe identifiers as a pre-serialized JSON array body.
+        """
+        return payload_encoder.encode_items(self.parse_tickers(tickers))
@@ -0,0 +1,255 @@
+import datetime
+import json
+import logging
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from decouple import Csv, config
+
+from app.main import BBG_CRED, load_app
+from app.schedule import CronSchedule
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] [%(name)s:%(lineno)s]: %(message)s",
+)
+
+DAEMON_APPS = config("DAEMON_APPS", cast=Csv())
+HEALTH_PORT = config("HEALTH_PORT", cast=int, default=8080)
+LATE_GRACE_SEC = 120
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    A scheduled app. The loader, client, session, SSE connection and catalog
+    id are created once and reused for every run. Runs happen on the job's
+    own thread, so a long run only delays the next run of the same app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.loader, self.client_class, self.config = load_app(app)
+        if "schedule" not in self.config:
+            raise ValueError(f"{app} app config has no schedule")
+
+        self.schedule = CronSchedule(self.config["schedule"])
+        self.client = None
+        self.next_run = self.schedule.next_after(datetime.datetime.now())
+        self.runs = 0
+        self.failures = 0
+        self.running = False
+        self.thread = None
+        self.started_at = None
+        self.last_duration = None
+        self.last_success = None
+        self.last_error = None
+
+    def start(self, on_finish=None):
+        """
+        Run the job on a new thread and call on_finish when it is done.
+        """
+        self.running = True
+        self.started_at = datetime.datetime.now()
+
+        def target():
+            try:
+                self.run()
+            finally:
+                if on_finish is not None:
+                    on_finish()
+
+        self.thread = threading.Thread(target=target, name=f"job-{self.app}")
+        self.thread.start()
+
+    def run(self):
+        self.running = True
+        start = time.monotonic()
+        try:
+            if self.client is None:
+                self.client = self.client_class(BBG_CRED, self.config)
+            else:
+                self.client.new_run()
+
+            tickers = self.loader.fetch()
+            self.client.run(tickers)
+        except Exception as err:
+            self.failures += 1
+            self.last_error = repr(err)
+            logger.exception(f"{self.app} run failed")
+        else:
+            self.last_success = time.time()
+            self.last_error = None
+        finally:
+            self.runs += 1
+            self.last_duration = time.monotonic() - start
+            self.next_run = self.schedule.next_after(datetime.datetime.now())
+            self.running = False
+            logger.info(
+                f"{self.app} run finished in {self.last_duration:.1f}s, "
+                f"next run at {self.next_run}"
+            )
+
+    def is_late(self, grace_sec=LATE_GRACE_SEC):
+        """
+        True when a run is overdue: the current run has overrun into the
+        next scheduled slot, or a run has not started within grace_sec of
+        its time.
+        """
+        now = datetime.datetime.now()
+        if self.running:
+            return self.schedule.next_after(self.started_at) < now
+        return (now - self.next_run).total_seconds() > grace_sec
+
+    def status(self):
+        return {
+            "app": self.app,
+            "schedule": self.schedule.expression,
+            "next_run": self.next_run.isoformat(),
+            "running": self.running,
+            "late": self.is_late(),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration_seconds": self.last_duration,
+            "last_success_timestamp": self.last_success,
+            "last_error": self.last_error,
+        }
+
+
+class Daemon:
+    def __init__(self, apps, health_port=HEALTH_PORT):
+        self.jobs = [Job(app) for app in apps]
+        self.health_port = health_port
+        self.started = time.time()
+        self.stopping = threading.Event()
+        self.wakeup = threading.Event()
+        self.server = None
+
+    def run_forever(self):
+        self.start_health_server()
+        for job in self.jobs:
+            logger.info(f"Scheduled {job.app} at {job.next_run}")
+
+        while not self.stopping.is_set():
+            self.wakeup.clear()
+            now = datetime.datetime.now()
+            for job in self.jobs:
+                if not job.running and job.next_run <= now:
+                    logger.info(f"Launching {job.app} App...")
+                    job.start(on_finish=self.wakeup.set)
+
+            idle = [job.next_run for job in self.jobs if not job.running]
+            wait = min(idle, default=now + datetime.timedelta(seconds=60)) - now
+            self.wakeup.wait(min(max(wait.total_seconds(), 0), 60))
+
+        for job in self.jobs:
+            if job.thread is not None:
+                job.thread.join()
+
+        if self.server:
+            self.server.shutdown()
+
+    def stop(self, *args):
+        logger.info("Stopping daemon, waiting for running jobs")
+        self.stopping.set()
+        self.wakeup.set()
+
+    def start_health_server(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/health":
+                    body = json.dumps(daemon.health()).encode("utf-8")
+                    content_type = "application/json"
+                elif self.path == "/metrics":
+                    body = daemon.metrics().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("", self.health_port), Handler)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        logger.info(f"Health endpoint listening on port {self.health_port}")
+
+    def health(self):
+        """
+        Overall status is "failing" when the last run of any job failed,
+        "late" when any job is overdue, and "ok" otherwise.
+        """
+        failing = [job.app for job in self.jobs if job.last_error is not None]
+        late = [job.app for job in self.jobs if job.is_late()]
+        if failing:
+            status = "failing"
+        elif late:
+            status = "late"
+        else:
+            status = "ok"
+        return {
+            "status": status,
+            "failing": failing,
+            "late": late,
+            "uptime_seconds": time.time() - self.started,
+            "jobs": [job.status() for job in self.jobs],
+        }
+
+    def metrics(self):
+        lines = [f"extbbg_uptime_seconds {time.time() - self.started:.0f}"]
+        for job in self.jobs:
+            label = f'{{app="{job.app}"}}'
+            lines.append(f"extbbg_runs_total{label} {job.runs}")
+            lines.append(f"extbbg_failures_total{label} {job.failures}")
+            lines.append(f"extbbg_running{label} {int(job.running)}")
+            lines.append(f"extbbg_late{label} {int(job.is_late())}")
+            if job.last_duration is not None:
+                lines.append(
+                    f"extbbg_last_duration_seconds{label} {job.last_duration:.3f}"
+                )
+            if job.last_success is not None:
+                lines.append(
+                    f"extbbg_last_success_timestamp{label} {job.last_success:.0f}"
+                )
+            if job.client is not None:
+                lines.extend(self.pool_metrics(job))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def pool_metrics(job):
+        lines = []
+        for pool, stats in job.client.pool_stats().items():
+            label = f'{{app="{job.app}",pool="{pool}"}}'
+            lines.append(f"extbbg_http_requests_total{label} {stats['checkouts']}")
+            lines.append(
+                f"extbbg_http_new_connections_total{label} {stats['new_connections']}"
+            )
+            lines.append(
+                f"extbbg_http_wait_seconds_total{label} {stats['wait_seconds']:.3f}"
+            )
+            lines.append(
+                f"extbbg_http_max_wait_seconds{label} {stats['max_wait_seconds']:.3f}"
+            )
+        return lines
+
+
+def main():
+    daemon = Daemon(DAEMON_APPS)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import datetime
 
 from app import client
-from db import mssql
+from app import payload
 
 
 class Client(client.Client):
@@ -25,11 +25,15 @@ class Client(client.Client):
         self.dataframe["timestamp_created_utc"] = datetime.datetime.utcnow()
         del self.dataframe["LAST_TRADE"]
 
+    def identifier_type(self):
+        return "ISIN" if self.config["is_identifier_isin"] else "TICKER"
+
+    def encode_identifier_values(self, tickers):
+        return payload.encode_identifiers(self.identifier_type(), tickers)
+
     def generate_identifier_values(self, tickers):
         result = []
-        template = self.utils.create_identifier_template(
-            "ISIN" if self.config["is_identifier_isin"] else "TICKER"
-        )
+        template = self.utils.create_identifier_template(self.identifier_type())
 
         for ticker in tickers:
             identifier = template.copy()
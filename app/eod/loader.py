@@ -1,4 +1,5 @@
 from app import loader
+from app.identifiers import IdentifierStore
 
 
 class Tickers(loader.Tickers):
@@ -6,5 +7,4 @@ class Tickers(loader.Tickers):
         super().__init__(table_name, columns, where)
 
     def parse(self):
-        records = self.df.to_dict("list")
-        self.parsed = list(records.values())[0]
+        self.parsed = IdentifierStore.from_frame(self.df)
@@ -0,0 +1,113 @@
+"""
+Universe identifiers with the input columns they were loaded with.
+"""
+
+
+class IdentifierStore:
+    """
+    Identifiers of a universe, deduplicated in load order, with the other
+    input columns kept as one array per column. It is used wherever a list
+    of tickers is: len(), iteration over the identifier values and slicing,
+    which returns a store over views of the same arrays.
+    """
+
+    def __init__(self, identifiers, attributes=None):
+        """
+        Args:
+            identifiers (numpy.ndarray): Unique identifier values.
+            attributes (dict): {column: numpy.ndarray} aligned with identifiers.
+        """
+        self.identifiers = identifiers
+        self.attributes = attributes or {}
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build a store from a loaded input table. The first column holds the
+        identifiers, the other columns are kept as attributes.
+        """
+        column = df.columns[0]
+        df = df[df[column].notna()].drop_duplicates(subset=column)
+        return cls(
+            df[column].to_numpy(dtype=object),
+            {c: df[c].to_numpy() for c in df.columns[1:]},
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        import numpy as np
+
+        return cls(
+            np.array(data["identifiers"], dtype=object),
+            {c: np.array(v, dtype=object) for c, v in data["attributes"].items()},
+        )
+
+    def to_dict(self):
+        """
+        Return the store as JSON-compatible lists, missing values as None.
+        Raises ValueError for attribute values that are not strings, numbers
+        or booleans, rather than changing their type on the way.
+        """
+        import numpy as np
+        import pandas as pd
+
+        def value(column, item):
+            if isinstance(item, (np.number, np.bool_)):
+                item = item.item()
+            if item is None or isinstance(item, (str, bool, int)):
+                return item
+            if isinstance(item, float):
+                return None if np.isnan(item) else item
+            if pd.api.types.is_scalar(item) and pd.isna(item):
+                return None
+            raise ValueError(
+                f"Attribute {column} has a {type(item).__name__} value {item!r}, "
+                "only strings, numbers and booleans can be serialised"
+            )
+
+        return {
+            "identifiers": self.identifiers.tolist(),
+            "attributes": {
+                c: [value(c, item) for item in v] for c, v in self.attributes.items()
+            },
+        }
+
+    def __len__(self):
+        return len(self.identifiers)
+
+    def __iter__(self):
+        return iter(self.identifiers)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self.identifiers[key]
+
+        return IdentifierStore(
+            self.identifiers[key], {c: v[key] for c, v in self.attributes.items()}
+        )
+
+    def join(self, df, on):
+        """
+        Add the attributes of the identifier in column on to every row of df,
+        in place, leaving out attributes df already has a column for. Rows of
+        unknown identifiers get missing values.
+        """
+        import pandas as pd
+
+        columns = [c for c in self.attributes if c not in df.columns]
+        if not columns:
+            return df
+
+        if self._index is None:
+            self._index = pd.Index(self.identifiers)
+        positions = self._index.get_indexer(df[on])
+
+        for column in columns:
+            # A nullable dtype keeps integer attributes integers when unknown
+            # identifiers get a missing value.
+            values = pd.Series(self.attributes[column]).convert_dtypes(
+                convert_string=False, convert_floating=False
+            )
+            df[column] = values.array.take(positions, allow_fill=True)
+        return df
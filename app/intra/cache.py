@@ -0,0 +1,60 @@
+import json
+import math
+import os
+
+
+class LastValueCache:
+    """
+    Last seen value per identifier and field, persisted to a JSON file
+    between runs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.values = {}
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.values = json.load(f)
+        except (OSError, ValueError):
+            self.values = {}
+        return self
+
+    def persist(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.values, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _normalize(value):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+
+    def changes(self, records, key, fields):
+        """
+        Compare records with the cached values.
+
+        Args:
+            records (list): Reply rows as dicts.
+            key (str): Identifier column.
+            fields (list): Columns to compare.
+
+        Returns:
+            tuple: One bool per record, True if any field differs from the
+                cached value or the identifier is new, and the latest values
+                to pass to commit once they are saved.
+        """
+        changed = []
+        latest = {}
+        for record in records:
+            identifier = str(record[key])
+            values = {f: self._normalize(record.get(f)) for f in fields}
+            changed.append(self.values.get(identifier) != values)
+            latest[identifier] = values
+        return changed, latest
+
+    def commit(self, latest):
+        self.values.update(latest)
@@ -0,0 +1,99 @@
+import atexit
+import time
+
+from app.eod import client
+from app.intra.cache import LastValueCache
+
+
+class Client(client.Client):
+    REPLACE_ON = client.Client.IDENTIFIER_COLUMN
+
+    def __init__(self, credential, config, cache=None):
+        """
+        Args:
+            credential (dict or list): BBG_CRED credential.
+            config (dict): App config.
+            cache (LastValueCache): Cache shared with the client that owns
+                it, e.g. by peers fetching its shares; loaded from
+                STATE_DIR and persisted at exit otherwise.
+        """
+        super().__init__(credential, config)
+        self.intraday = config.get("intraday", {})
+        if cache is None:
+            cache = LastValueCache(
+                self.utils.state_path(f"lvc_{config['output_table']}.json")
+            ).load()
+            atexit.register(cache.persist)
+        self.cache = cache
+        self.universe = None
+        self.universe_key = None
+
+    def _new_peer(self, account):
+        return type(self)(account.to_dict(), self.config, cache=self.cache)
+
+    def create_universe(self, tickers):
+        """
+        Return the universe of the previous cycle if it holds the same
+        identifiers, and create it otherwise.
+        """
+        key = tuple(tickers)
+        if key != self.universe_key:
+            self.universe = super().create_universe(tickers)
+            self.universe_key = key
+        return self.universe
+
+    def run(self, tickers):
+        """
+        Fetch the tickers every interval_sec seconds, spread over the accounts
+        like any other run, writing only the rows that changed since the
+        previous cycle. Every client creates its universe once and requests
+        it again while its share of the tickers stays the same.
+        """
+        interval = self.intraday.get("interval_sec", 300)
+        cycles = self.intraday.get("cycles", 1)
+
+        try:
+            for cycle in range(1, cycles + 1):
+                started = time.monotonic()
+                if cycle > 1:
+                    self.new_run()
+
+                self.fetch(tickers)
+                self.save()
+
+                latency = time.monotonic() - started
+                self.log.info(f"Cycle {cycle}/{cycles} finished in {latency:.1f}s")
+                if cycle < cycles:
+                    time.sleep(max(interval - latency, 0))
+        finally:
+            self.cache.persist()
+
+        return True
+
+    def save(self):
+        if not self.status or not len(self.dataframe):
+            self.log.info("Dataframe NOT found")
+            return False
+
+        delete_columns = set(self.config["delete_columns"])
+        fields = [
+            c
+            for c in self.dataframe.columns
+            if c not in delete_columns and c != self.IDENTIFIER_COLUMN
+        ]
+        changed, latest = self.cache.changes(
+            self.dataframe.to_dict("records"), self.IDENTIFIER_COLUMN, fields
+        )
+        total = len(self.dataframe)
+        self.dataframe = self.dataframe[changed].reset_index(drop=True)
+        self.log.info(
+            f"{len(self.dataframe)}/{total} rows changed "
+            f"(change ratio {len(self.dataframe) / total:.1%})"
+        )
+
+        if len(self.dataframe):
+            self._process_dataframe()
+            self._save_dataframe_to_sinks()
+
+        self.cache.commit(latest)
+        return True
@@ -0,0 +1,6 @@
+from app.eod import loader
+
+
+class Tickers(loader.Tickers):
+    def __init__(self, table_name, columns=None, where=None):
+        super().__init__(table_name, columns, where)
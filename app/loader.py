@@ -1,6 +1,3 @@
-from db import mssql
-
-
 class Tickers:
     def __init__(self, table_name, columns=None, where=None):
         self.df = None
@@ -15,7 +12,9 @@ class Tickers:
         return self.parsed
 
     def load_table(self):
-        c = mssql.MSSQLDatabase()
+        from db import mssql
+
+        c = mssql.MSSQLDatabase.shared()
         self.df = c.select_table(self.table_name, self.columns, self.where)
 
     def parse(self):
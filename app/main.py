@@ -1,11 +1,10 @@
-import importlib
 import json
 import logging
-import os
 import sys
 
 from decouple import config
 
+from app import registry
 from config import get_config
 
 logging.basicConfig(
@@ -13,48 +12,66 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] [%(name)s:%(lineno)s]: %(message)s",
 )
 
-APP = config("APP", cast=str)
+APP = config("APP", cast=str, default="")
+DRY_RUN = config("DRY_RUN", cast=bool, default=False)
 BBG_CRED = json.loads(config("BBG_CRED", cast=str))
 logger = logging.getLogger(__name__)
 
 
-def app_exist(app):
-    path = os.path.dirname(__file__)
-    return app in (
-        entry for entry in os.listdir(path) if os.path.isdir(os.path.join(path, entry))
-    )
-
-
-def load_app(app):
+def resolve_app(app):
+    """
+    Return the plugin and configuration of app without importing its loader
+    or client.
+    """
     app_config = get_config(app)
     if not app_config:
         raise ValueError(f"{app} app config not found")
 
-    if not app_exist(app_config["app_name"]):
-        raise ValueError(f"{app} app not found")
+    plugin = registry.get_plugin(app_config.get("plugin", app_config["app_name"]))
+    return plugin, app_config
+
 
-    path = os.path.dirname(__file__)
-    sys.path.append(os.path.join(path, app_config["app_name"]))
-    loader_instance = getattr(importlib.import_module("loader"), "Tickers")(
+def load_app(app):
+    plugin, app_config = resolve_app(app)
+    loader_instance = plugin.loader_class()(
         app_config["input"]["table"],
         app_config["input"]["columns"],
         app_config["input"]["where"],
     )
-    client_class = getattr(importlib.import_module("client"), "Client")
-    return loader_instance, client_class, app_config
+    return loader_instance, plugin.client_class(), app_config
+
+
+def plan(app):
+    """
+    Describe what a run of app would do, for dry runs.
+    """
+    plugin, app_config = resolve_app(app)
+    sinks = app_config.get("sinks") or [{"type": "mssql"}]
+    return {
+        "app": app,
+        "plugin": plugin.name,
+        "loader": plugin.loader,
+        "client": plugin.client,
+        "input": app_config["input"],
+        "field_url": app_config.get("field_url"),
+        "sinks": [
+            spec.get("path") or spec.get("table", app_config["output_table"])
+            for spec in sinks
+        ],
+    }
+
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if DRY_RUN or "--dry-run" in argv:
+        print(json.dumps(plan(APP), indent=2))
+        return
 
-def main():
     loader, Client, app_config = load_app(APP)
     logger.info(f"Launching {APP} App...")
     tickers = loader.fetch()
     client = Client(BBG_CRED, app_config)
-    universe = client.create_universe(tickers)
-    field = app_config["field_url"]
-    trigger = client.get_trigger()
-    client.request(universe, field, trigger)
-    client.listen()
-    client.save()
+    client.run(tickers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from decouple import config
+
+from app.utils import Utils
+
+METADATA_TTL_HOURS = config("METADATA_TTL_HOURS", cast=float, default=24)
+_PATH_LOCKS = defaultdict(threading.Lock)
+
+
+class MetadataCache:
+    """
+    Local JSON cache with a TTL for BEAP metadata that rarely changes, such
+    as the scheduled catalog id and the field definitions of a field list.
+
+    Several instances, in this or other processes, can share a file: a
+    writer takes a file lock, merges its entry into the file as it is on
+    disk and replaces it through a temporary file of its own.
+    """
+
+    def __init__(self, path=None, ttl_hours=METADATA_TTL_HOURS):
+        self.path = path or Utils.state_path("metadata.json")
+        self.ttl = ttl_hours * 3600
+        self.lock = _PATH_LOCKS[os.path.abspath(self.path)]
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self.lock:
+            with open(f"{self.path}.lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            # Another instance may have stored it since this one loaded.
+            self.entries = self._load()
+            entry = self.entries.get(key)
+        if entry is None or time.time() - entry["stored_at"] > self.ttl:
+            return None
+        return entry["value"]
+
+    def set(self, key, value):
+        entry = {"stored_at": time.time(), "value": value}
+        with self._locked():
+            self.entries = self._load()
+            self.entries[key] = entry
+            with tempfile.NamedTemporaryFile(
+                "w",
+                dir=os.path.dirname(os.path.abspath(self.path)),
+                suffix=".tmp",
+                delete=False,
+                encoding="utf-8",
+            ) as f:
+                json.dump(self.entries, f)
+            os.replace(f.name, self.path)
@@ -0,0 +1,71 @@
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    """
+    Serialize obj to compact JSON bytes, using orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def encode_identifiers(identifier_type, values):
+    """
+    Encode a list of identifier values as the body of a JSON array.
+
+    The identifier object prefix is encoded once and only the value is
+    serialized per item, which avoids building a dict per identifier.
+
+    Args:
+        identifier_type (str): Bloomberg identifier type, e.g. ISIN or TICKER.
+        values (iterable): Identifier values.
+
+    Returns:
+        bytes: Comma separated identifier objects, without the brackets.
+    """
+    prefix = (
+        b'{"@type":"Identifier","identifierType":'
+        + dumps(identifier_type)
+        + b',"identifierValue":'
+    )
+    return b",".join(prefix + dumps(value) + b"}" for value in values)
+
+
+def encode_items(items):
+    """
+    Encode already built resource items as the body of a JSON array.
+    """
+    return b",".join(dumps(item) for item in items)
+
+
+def encode_resource(payload, contains=None):
+    """
+    Encode a resource payload, splicing in a pre-encoded "contains" array.
+
+    Args:
+        payload (dict): Resource payload without the "contains" key.
+        contains (bytes): Output of encode_identifiers or encode_items.
+
+    Returns:
+        bytes: JSON document ready to be posted.
+    """
+    body = dumps(payload)
+    if contains is None:
+        return body
+
+    return body[:-1] + b',"contains":[' + contains + b"]}"
+
+
+def compress(body, level=6):
+    """
+    Gzip a request body.
+    """
+    return gzip.compress(body, compresslevel=level)
@@ -0,0 +1,88 @@
+"""
+Registry of app plugins.
+
+A plugin names the loader and client classes of an app as "module:attribute"
+strings, so resolving an app from its configuration imports nothing; the
+modules, and pandas and the MSSQL drivers behind them, are only imported when
+a stage asks for the class.
+
+Apps shipped in this repository are registered below. Other packages can
+provide apps through the "extbbg.apps" entry point group, pointing at an
+AppPlugin instance:
+
+    [project.entry-points."extbbg.apps"]
+    fx = "extbbg_fx.plugin:PLUGIN"
+
+An app configuration selects its plugin with the "plugin" key, defaulting to
+its app_name.
+"""
+
+import importlib
+
+ENTRY_POINT_GROUP = "extbbg.apps"
+
+
+class AppPlugin:
+    def __init__(self, name, loader, client):
+        """
+        Args:
+            name (str): Plugin name, as used by the "plugin" config key.
+            loader (str): "module:attribute" of the loader class.
+            client (str): "module:attribute" of the Client class.
+        """
+        self.name = name
+        self.loader = loader
+        self.client = client
+
+    @staticmethod
+    def _resolve(target):
+        module, _, attribute = target.partition(":")
+        return getattr(importlib.import_module(module), attribute)
+
+    def loader_class(self):
+        return self._resolve(self.loader)
+
+    def client_class(self):
+        return self._resolve(self.client)
+
+
+PLUGINS = {}
+
+
+def register(name, loader, client):
+    PLUGINS[name] = AppPlugin(name, loader, client)
+    return PLUGINS[name]
+
+
+def _entry_points():
+    from importlib import metadata
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=ENTRY_POINT_GROUP)
+    return entry_points.get(ENTRY_POINT_GROUP, [])
+
+
+def get_plugin(name):
+    """
+    Return the plugin registered as name, looking it up in the installed
+    entry points when it is not built in.
+    """
+    if name not in PLUGINS:
+        for entry_point in _entry_points():
+            if entry_point.name == name:
+                PLUGINS[name] = entry_point.load()
+                break
+        else:
+            raise ValueError(f"{name} app not found")
+
+    return PLUGINS[name]
+
+
+def available():
+    return sorted(set(PLUGINS) | {entry_point.name for entry_point in _entry_points()})
+
+
+register("eod", "app.eod.loader:Tickers", "app.eod.client:Client")
+register("intra", "app.intra.loader:Tickers", "app.intra.client:Client")
+register("backfill", "app.backfill.loader:Tickers", "app.backfill.client:Client")
@@ -0,0 +1,97 @@
+import datetime
+
+
+class CronSchedule:
+    """
+    Minimal five-field cron expression: minute hour day-of-month month
+    day-of-week. Supports "*", "*/n", "a-b", "a-b/n", "a/n" (a to the
+    field maximum every n) and comma separated lists. Day-of-week uses 0-6
+    with 0 (or 7) as Sunday. As in cron, a day matches either day field
+    when both are restricted, and both when one of them starts with "*".
+    """
+
+    FIELDS = (
+        ("minute", 0, 59),
+        ("hour", 0, 23),
+        ("day", 1, 31),
+        ("month", 1, 12),
+        ("weekday", 0, 7),
+    )
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != len(self.FIELDS):
+            raise ValueError(f"Invalid cron expression: {expression!r}")
+
+        self.expression = expression
+        values = {}
+        for part, (name, low, high) in zip(parts, self.FIELDS):
+            values[name] = self._parse_field(part, low, high)
+
+        if 7 in values["weekday"]:
+            values["weekday"] = (values["weekday"] - {7}) | {0}
+
+        self.minutes = values["minute"]
+        self.hours = values["hour"]
+        self.days = values["day"]
+        self.months = values["month"]
+        self.weekdays = values["weekday"]
+        self.any_day = parts[2].startswith("*")
+        self.any_weekday = parts[4].startswith("*")
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        result = set()
+        for item in field.split(","):
+            step = None
+            if "/" in item:
+                item, step = item.split("/")
+                step = int(step)
+
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(v) for v in item.split("-"))
+            elif step is not None:
+                start, end = int(item), high
+            else:
+                start = end = int(item)
+
+            step = 1 if step is None else step
+
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field: {field!r}")
+
+            result.update(range(start, end + 1, step))
+        return result
+
+    def _day_matches(self, date):
+        weekday = (date.weekday() + 1) % 7
+        day_match = date.day in self.days
+        weekday_match = weekday in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_after(self, moment):
+        """
+        Return the first matching minute strictly after moment.
+        """
+        moment = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = moment + datetime.timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months or not self._day_matches(moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+
+            if moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+                continue
+
+            if moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+                continue
+
+            return moment
+
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
@@ -0,0 +1,169 @@
+"""
+Coordinator/worker mode spreading one app's tickers over several nodes.
+
+    python -m app.shard coordinator
+    python -m app.shard worker
+
+The coordinator splits the tickers into shards in a lease table and, once
+every shard is done, publishes the staged output in one transaction.
+Workers claim shards, run request/listen/transform for them and write
+their rows to the staging table. Leases of dead workers expire and are
+claimed again.
+"""
+
+import datetime
+import logging
+import socket
+import sys
+import threading
+import time
+import uuid
+
+from decouple import config
+
+from app.identifiers import IdentifierStore
+from app.main import APP, BBG_CRED, load_app
+from app.utils import Utils
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] [%(name)s:%(lineno)s]: %(message)s",
+)
+
+SHARD_RUN_ID = config(
+    "SHARD_RUN_ID",
+    default=f"{APP}-{datetime.datetime.utcnow().strftime('%Y%m%d')}",
+)
+logger = logging.getLogger(__name__)
+
+
+def get_store(sharding):
+    if sharding.get("backend", "sqlite") == "mssql":
+        from db.lease import MSSQLShardStore
+
+        store = MSSQLShardStore()
+    else:
+        from db.lease import SQLiteShardStore
+
+        store = SQLiteShardStore(
+            sharding.get("sqlite_path") or Utils.state_path("shards.db")
+        )
+
+    store.setup()
+    return store
+
+
+def split(tickers, shard_size):
+    return [tickers[i : i + shard_size] for i in range(0, len(tickers), shard_size)]
+
+
+def coordinator(app=APP, run_id=SHARD_RUN_ID):
+    loader, _, app_config = load_app(app)
+    sharding = app_config.get("sharding", {})
+    store = get_store(sharding)
+    stage_table = sharding.get("stage_table", f"{app_config['output_table']}_stage")
+
+    tickers = loader.fetch()
+    shards = split(tickers, sharding.get("shard_size", 5000))
+    if isinstance(tickers, IdentifierStore):
+        shards = [shard.to_dict() for shard in shards]
+    store.create_run(run_id, shards)
+    logger.info(f"Run {run_id}: {len(tickers)} tickers in {len(shards)} shards")
+
+    deadline = time.monotonic() + sharding.get("timeout_sec", 6 * 3600)
+    while True:
+        remaining = store.remaining(run_id)
+        if not remaining:
+            break
+        if time.monotonic() > deadline:
+            raise TimeoutError(
+                f"Run {run_id}: {remaining} shards not done before the timeout"
+            )
+        logger.info(f"Run {run_id}: waiting for {remaining} shards")
+        time.sleep(sharding.get("poll_sec", 30))
+
+    return store.publish(stage_table, app_config["output_table"], run_id)
+
+
+def worker(app=APP, run_id=SHARD_RUN_ID):
+    _, Client, app_config = load_app(app)
+    sharding = app_config.get("sharding", {})
+    store = get_store(sharding)
+    stage_table = sharding.get("stage_table", f"{app_config['output_table']}_stage")
+    lease_sec = sharding.get("lease_sec", 3600)
+    owner = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+    client = None
+
+    while True:
+        claimed = store.claim(run_id, owner, lease_sec)
+        if claimed is None:
+            if not store.remaining(run_id):
+                logger.info(f"Run {run_id}: no shards left")
+                return
+            time.sleep(sharding.get("poll_sec", 30))
+            continue
+
+        shard_id, tickers = claimed
+        if isinstance(tickers, dict):
+            tickers = IdentifierStore.from_dict(tickers)
+        logger.info(f"Run {run_id}: {owner} claimed shard {shard_id}")
+        if client is None:
+            client = Client(BBG_CRED, app_config)
+        else:
+            client.new_run()
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_renew,
+            args=(store, run_id, shard_id, owner, lease_sec, stop),
+            daemon=True,
+        )
+        heartbeat.start()
+        held = True
+        try:
+            client.fetch(tickers)
+            if client.status and len(client.dataframe):
+                held = store.write_stage(
+                    client.transform(),
+                    stage_table,
+                    run_id,
+                    shard_id,
+                    owner,
+                    lease_sec,
+                )
+        except BaseException:
+            store.release(run_id, shard_id, owner)
+            raise
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if not client.status:
+            # Let any worker retry the shard now instead of after lease_sec.
+            logger.warning(f"Run {run_id}: shard {shard_id} reply not delivered")
+            store.release(run_id, shard_id, owner)
+            continue
+
+        if not held or not store.complete(run_id, shard_id, owner):
+            logger.warning(f"Run {run_id}: lease on shard {shard_id} was lost")
+
+
+def _renew(store, run_id, shard_id, owner, lease_sec, stop):
+    while not stop.wait(lease_sec / 3):
+        if not store.renew(run_id, shard_id, owner, lease_sec):
+            logger.warning(f"Run {run_id}: could not renew lease on shard {shard_id}")
+            return
+
+
+def main():
+    role = sys.argv[1] if len(sys.argv) > 1 else "worker"
+    if role == "coordinator":
+        coordinator()
+    elif role == "worker":
+        worker()
+    else:
+        raise ValueError(f"Unknown role {role}, expected coordinator or worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import abc
+import datetime
+import io
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.checkpoint import Checkpoint
+from app.utils import Utils
+
+
+class Sink(abc.ABC):
+    """
+    Destination for a processed reply. Sinks receive the same DataFrame
+    concurrently and must not modify it.
+
+    Like the MSSQL output table, a sink given replace_on key column(s) only
+    replaces the rows with the keys found in the DataFrame; without it the
+    whole destination is replaced.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    @abc.abstractmethod
+    def write(self, df):
+        """
+        Write df to the destination.
+        """
+
+    @staticmethod
+    def _key_columns(replace_on):
+        return [replace_on] if isinstance(replace_on, str) else list(replace_on)
+
+
+class MSSQLSink(Sink):
+    """
+    Inserts into an MSSQL table. With batch_size the rows are committed in
+    checkpointed batches to a staging table and published atomically.
+    """
+
+    def __init__(
+        self, table, field_types=None, replace_on=None, batch_size=None, run_id=None
+    ):
+        super().__init__(f"mssql:{table}")
+        self.table = table
+        self.field_types = field_types
+        self.replace_on = replace_on
+        self.batch_size = batch_size
+        self.run_id = run_id
+
+    def write(self, df):
+        from db import mssql
+
+        conn = mssql.MSSQLDatabase.shared()
+        if not self.batch_size:
+            conn.insert_table(
+                df, self.table, field_types=self.field_types, replace_on=self.replace_on
+            )
+            return
+
+        checkpoint = Checkpoint(Utils.state_path(f"insert_{self.table}.json"))
+        conn.insert_table_batched(
+            df,
+            self.table,
+            self.run_id,
+            checkpoint,
+            batch_size=self.batch_size,
+            field_types=self.field_types,
+            replace_on=self.replace_on,
+        )
+
+
+class ParquetSink(Sink):
+    """
+    Writes a parquet dataset. With replace_partitions, the partitions the
+    DataFrame writes to are replaced instead of appended to, so reloading
+    e.g. a backfill window does not duplicate its dates.
+    """
+
+    def __init__(self, path, partition_cols=None, replace_partitions=False):
+        super().__init__(f"parquet:{path}")
+        self.path = path
+        self.partition_cols = partition_cols
+        self.replace_partitions = replace_partitions
+
+    def write(self, df):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("The parquet sink requires pyarrow to be installed")
+
+        options = {}
+        if self.partition_cols and self.replace_partitions:
+            options["existing_data_behavior"] = "delete_matching"
+        df.to_parquet(
+            self.path, partition_cols=self.partition_cols, index=False, **options
+        )
+
+
+class CsvSink(Sink):
+    """
+    Writes a CSV file. With replace_on, the rows of an existing file whose
+    keys are not in the DataFrame are kept; the file is rewritten through a
+    temporary file so a failed write leaves the previous one in place.
+    """
+
+    def __init__(self, path, compression="gzip", replace_on=None):
+        super().__init__(f"csv:{path}")
+        self.path = path
+        self.compression = compression
+        self.replace_on = replace_on
+
+    def write(self, df):
+        import pandas as pd
+
+        if self.replace_on and os.path.exists(self.path):
+            columns = self._key_columns(self.replace_on)
+            existing = pd.read_csv(
+                self.path,
+                compression=self.compression,
+                dtype=str,
+                keep_default_na=False,
+            )
+            # Compare keys as the CSV writer formats them, e.g. dates.
+            df = pd.read_csv(
+                io.StringIO(df.to_csv(index=False)), dtype=str, keep_default_na=False
+            )
+            keys = pd.MultiIndex.from_frame(df[columns])
+            kept = ~pd.MultiIndex.from_frame(existing[columns]).isin(keys)
+            df = pd.concat([existing[kept], df], ignore_index=True)
+
+        temp = f"{self.path}.tmp"
+        df.to_csv(temp, compression=self.compression, index=False)
+        os.replace(temp, self.path)
+
+
+class SQLiteSink(Sink):
+    """
+    Writes a table of a SQLite database in one transaction. With replace_on,
+    the keys are written to a scratch table first so they are stored with
+    the same conversions as the rows they are matched against.
+    """
+
+    def __init__(self, path, table, replace_on=None):
+        super().__init__(f"sqlite:{path}:{table}")
+        self.path = path
+        self.table = table
+        self.replace_on = replace_on
+
+    def write(self, df):
+        table = '"{}"'.format(self.table.replace('"', '""'))
+        cnx = sqlite3.connect(self.path)
+        try:
+            exists = cnx.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (self.table,),
+            ).fetchone()
+            if exists and self.replace_on:
+                self._delete_keys(cnx, table, df)
+            elif exists:
+                cnx.execute(f"DELETE FROM {table}")
+            df.to_sql(self.table, cnx, if_exists="append", index=False)
+            cnx.commit()
+        except Exception:
+            cnx.rollback()
+            raise
+        finally:
+            cnx.close()
+
+    def _delete_keys(self, cnx, table, df):
+        columns = self._key_columns(self.replace_on)
+        scratch = f"{self.table}_keys"
+        df[columns].drop_duplicates().to_sql(
+            scratch, cnx, if_exists="replace", index=False
+        )
+        matches = " AND ".join(f'k."{c}" = t."{c}"' for c in columns)
+        cnx.execute(
+            f"DELETE FROM {table} AS t "
+            f'WHERE EXISTS (SELECT 1 FROM "{scratch}" AS k WHERE {matches})'
+        )
+        cnx.execute(f'DROP TABLE "{scratch}"')
+
+
+def build_sinks(client):
+    """
+    Build the sinks of the client's app config. Without a "sinks" key the
+    reply goes to the MSSQL output table only.
+
+    File paths may use {app}, {date} and {session_id} placeholders.
+    """
+    config = client.config
+    specs = config.get("sinks") or [{"type": "mssql"}]
+    fields = {
+        "app": config["app_name"],
+        "date": datetime.datetime.utcnow().strftime("%Y%m%d"),
+        "session_id": client.session_id,
+    }
+
+    sinks = []
+    for spec in specs:
+        kind = spec["type"]
+        path = spec.get("path", "").format(**fields)
+        if path and kind != "mssql":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        if kind == "mssql":
+            sinks.append(
+                MSSQLSink(
+                    spec.get("table", config["output_table"]),
+                    client.safe_field_types(),
+                    client.REPLACE_ON,
+                    spec.get("batch_size"),
+                    client.run_key(),
+                )
+            )
+        elif kind == "parquet":
+            sinks.append(
+                ParquetSink(
+                    path,
+                    spec.get("partition_cols"),
+                    spec.get("replace_partitions", False),
+                )
+            )
+        elif kind == "csv":
+            sinks.append(
+                CsvSink(path, spec.get("compression", "gzip"), client.REPLACE_ON)
+            )
+        elif kind == "sqlite":
+            sinks.append(
+                SQLiteSink(
+                    path,
+                    spec.get("table", config["output_table"].replace(".", "_")),
+                    client.REPLACE_ON,
+                )
+            )
+        else:
+            raise ValueError(f"Unknown sink type {kind}")
+
+    return sinks
+
+
+def write_all(sinks, df):
+    """
+    Write df to every sink concurrently.
+
+    Returns:
+        list: One dict per sink with its name, status, duration and error.
+    """
+
+    def write(sink):
+        start = time.perf_counter()
+        try:
+            sink.write(df)
+        except Exception as err:
+            error = repr(err)
+        else:
+            error = None
+        return {
+            "sink": sink.name,
+            "ok": error is None,
+            "rows": len(df),
+            "seconds": time.perf_counter() - start,
+            "error": error,
+        }
+
+    if len(sinks) == 1:
+        return [write(sinks[0])]
+
+    with ThreadPoolExecutor(len(sinks)) as executor:
+        return list(executor.map(write, sinks))
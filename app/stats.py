@@ -0,0 +1,156 @@
+"""
+Request-to-delivery turnaround history.
+
+    python -m app.stats [app]
+
+prints the expected delivery statistics per app so dependent jobs can be
+scheduled just after the usual delivery time.
+"""
+
+import contextlib
+import sqlite3
+import sys
+
+from decouple import config
+
+from app.utils import Utils
+
+LISTENER_TIMEOUT_MARGIN = config("LISTENER_TIMEOUT_MARGIN", cast=float, default=0.25)
+LISTENER_TIMEOUT_MIN_SAMPLES = config(
+    "LISTENER_TIMEOUT_MIN_SAMPLES", cast=int, default=5
+)
+
+
+class TurnaroundStore:
+    """
+    SQLite store of how long replies took per app and universe size. Clients
+    record under "app_name:output_table"; reading by app_name alone covers
+    all of its output tables.
+    """
+
+    HISTORY = 200
+
+    def __init__(self, path=None):
+        self.path = path or Utils.state_path("turnaround.db")
+        with self._connect() as cnx:
+            cnx.execute(
+                "CREATE TABLE IF NOT EXISTS turnaround ("
+                "app TEXT, universe_size INTEGER, requested_at REAL, "
+                "latency REAL, delivered INTEGER)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        cnx = sqlite3.connect(self.path, timeout=30)
+        try:
+            with cnx:
+                yield cnx
+        finally:
+            cnx.close()
+
+    def record(self, app, universe_size, requested_at, latency, delivered):
+        with self._connect() as cnx:
+            cnx.execute(
+                "INSERT INTO turnaround VALUES (?, ?, ?, ?, ?)",
+                (app, universe_size, requested_at, latency, int(delivered)),
+            )
+
+    @staticmethod
+    def _match(app):
+        """
+        Return the condition and parameters selecting app, either a full
+        "app_name:output_table" key or an app_name and all of its keys.
+        """
+        return "(app = ? OR substr(app, 1, ?) = ?)", [app, len(app) + 1, f"{app}:"]
+
+    def samples(self, app, universe_size=None):
+        """
+        Return the latest (latency, delivered) rows of app, newest first,
+        restricted to universes between half and twice universe_size when
+        given. The latency of a run that was not delivered is the time it
+        waited, i.e. at least the timeout it used.
+        """
+        condition, params = self._match(app)
+        query = f"SELECT latency, delivered FROM turnaround WHERE {condition}"
+        if universe_size:
+            query += " AND universe_size BETWEEN ? AND ?"
+            params += [universe_size // 2, universe_size * 2]
+        query += " ORDER BY requested_at DESC LIMIT ?"
+        params.append(self.HISTORY)
+
+        with self._connect() as cnx:
+            return cnx.execute(query, params).fetchall()
+
+    def latencies(self, app, universe_size=None, delivered_only=False):
+        """
+        Return the latest latencies of app in seconds, sorted. Runs that
+        timed out count with the time they waited, a lower bound of their
+        real latency, unless delivered_only.
+        """
+        return sorted(
+            latency
+            for latency, delivered in self.samples(app, universe_size)
+            if delivered or not delivered_only
+        )
+
+    @staticmethod
+    def quantile(values, q):
+        index = min(int(q * len(values)), len(values) - 1)
+        return values[index]
+
+    def deadline(self, app, universe_size, default, minimum=300):
+        """
+        Listener timeout in seconds: p99 of similar requests, timed out ones
+        included, plus the configured margin, or default while there is not
+        enough history. After a timed out request it is at least default.
+
+        Returns:
+            tuple: The timeout and the median latency (None without history).
+        """
+        samples = self.samples(app, universe_size)
+        if len(samples) < LISTENER_TIMEOUT_MIN_SAMPLES:
+            return default, None
+
+        values = sorted(latency for latency, _ in samples)
+        p99 = self.quantile(values, 0.99) * (1 + LISTENER_TIMEOUT_MARGIN)
+        timeout = max(minimum, p99)
+        if not samples[0][1]:
+            # The last run timed out: wait at least as long as without history.
+            timeout = max(timeout, default)
+        return timeout, self.quantile(values, 0.5)
+
+    def summary(self, app=None):
+        with self._connect() as cnx:
+            if app:
+                apps = [app]
+            else:
+                query = "SELECT DISTINCT app FROM turnaround"
+                apps = [row[0] for row in cnx.execute(query)]
+            result = {}
+            for name in apps:
+                values = self.latencies(name, delivered_only=True)
+                condition, params = self._match(name)
+                missed = cnx.execute(
+                    f"SELECT COUNT(*) FROM turnaround WHERE {condition} "
+                    "AND delivered = 0",
+                    params,
+                ).fetchone()[0]
+                result[name] = {"samples": len(values), "not_delivered": missed}
+                if values:
+                    for q in (0.5, 0.9, 0.99):
+                        result[name][f"p{int(q * 100)}"] = self.quantile(values, q)
+            return result
+
+
+def main():
+    app = sys.argv[1] if len(sys.argv) > 1 else None
+    for name, stats in TurnaroundStore().summary(app).items():
+        line = ", ".join(
+            f"{k}={v / 60:.1f}m" if k.startswith("p") else f"{k}={v}"
+            for k, v in stats.items()
+        )
+        print(f"{name}: {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,22 @@
 import datetime
+import os
 import uuid
 
+from decouple import config
+
+STATE_DIR = config("STATE_DIR", default=os.path.join(os.getcwd(), ".extbbg"))
+
 
 class Utils:
+    @staticmethod
+    def state_path(*parts):
+        """
+        Return a path under the local state directory, creating its parent.
+        """
+        path = os.path.join(STATE_DIR, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
     @staticmethod
     def random_id():
         """
@@ -44,7 +58,8 @@ class Utils:
     @staticmethod
     def _reformat_last_update(row):
         x, y = row["LAST_UPDATE"], row["LAST_UPDATE_DT"]
-        if not isinstance(x, str) and not isinstance(y, str):
+        # Without LAST_UPDATE (None or NaN) the time of the update is unknown.
+        if not isinstance(x, str):
             return None
 
         if ":" not in x:
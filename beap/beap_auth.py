@@ -13,8 +13,10 @@ import json
 import logging
 import os
 import sys
+import threading
 import time
 import uuid
+from collections import OrderedDict, deque
 
 # Cope with python2/3 differences
 try:
@@ -34,8 +36,11 @@ import pkg_resources
 import requests
 import requests.adapters
 import requests.packages
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from urllib3.util.retry import Retry
 
+from beap.log_body import log_body
+
 LOG = logging.getLogger(__name__)
 
 DAYS_IN_MONTH = 30
@@ -44,6 +49,7 @@ REGION = "default"
 FILES_ENCODING = "utf-8"
 JWT_LIFETIME = 25
 JWT_MAX_CLOCK_SKEW = 180
+JWT_POOL_SIZE = int(os.environ.get("JWT_POOL_SIZE", 4))
 
 PYTHON = sys.version_info
 
@@ -202,6 +208,178 @@ class Credentials(object):
         return jwt.encode(payload, key)
 
 
+class TokenPool(object):
+    """
+    Pool of pre-signed single-use JWT tokens per (path, method, host).
+
+    A background thread keeps ``size`` fresh tokens for every key that was
+    requested at least ``min_requests`` times recently, so ``get`` usually
+    avoids signing on the request thread while one-off requests, e.g. of a
+    single reply download, don't get tokens signed that are never used.
+    Tokens older than ``JWT_LIFETIME - min_remaining`` seconds are dropped,
+    and keys idle for ``idle_timeout`` seconds are forgotten.
+    """
+
+    def __init__(
+        self,
+        credentials,
+        size=JWT_POOL_SIZE,
+        refill_interval=1.0,
+        min_remaining=5,
+        idle_timeout=60,
+        max_keys=64,
+        min_requests=2,
+    ):
+        """
+        :param credentials: Credentials used to sign the tokens
+        :type credentials: ``Credentials``
+        :param size: Number of tokens kept per key
+        :type size: int
+        :param min_requests: Requests of a key before it is pre-signed
+        :type min_requests: int
+        """
+        self.credentials = credentials
+        self.size = size
+        self.refill_interval = refill_interval
+        self.max_age = JWT_LIFETIME - min_remaining
+        self.idle_timeout = idle_timeout
+        self.max_keys = max_keys
+        self.min_requests = min_requests
+        self.pools = OrderedDict()
+        self.last_used = {}
+        self.requests = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def get(self, path, method, host):
+        """
+        Return a pre-signed token for the request, or sign one if the pool
+        for this key is empty.
+        """
+        key = (path, method, host)
+        now = time.time()
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is None:
+                pool = self.pools[key] = deque()
+                while len(self.pools) > self.max_keys:
+                    old_key, _ = self.pools.popitem(last=False)
+                    self.last_used.pop(old_key, None)
+                    self.requests.pop(old_key, None)
+            else:
+                self.pools.move_to_end(key)
+            self.last_used[key] = now
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            while pool:
+                token, signed_at = pool.popleft()
+                if now - signed_at < self.max_age:
+                    self.hits += 1
+                    self.wakeup.set()
+                    return token
+            self.misses += 1
+
+        self.wakeup.set()
+        return self.credentials.generate_token(path, method, host)
+
+    def close(self):
+        self.stopped.set()
+        self.wakeup.set()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.wakeup.wait(self.refill_interval)
+            self.wakeup.clear()
+            try:
+                self._refill()
+            except Exception:
+                LOG.exception("Failed to refill the JWT token pool")
+
+    def _refill(self):
+        now = time.time()
+        with self.lock:
+            idle = [k for k, t in self.last_used.items() if now - t > self.idle_timeout]
+            for key in idle:
+                self.pools.pop(key, None)
+                self.last_used.pop(key, None)
+                self.requests.pop(key, None)
+            wanted = {}
+            for key, pool in self.pools.items():
+                while pool and now - pool[0][1] >= self.max_age:
+                    pool.popleft()
+                if self.requests.get(key, 0) < self.min_requests:
+                    continue
+                if len(pool) < self.size:
+                    wanted[key] = self.size - len(pool)
+
+        for key, count in wanted.items():
+            tokens = [
+                (self.credentials.generate_token(*key), time.time())
+                for _ in range(count)
+            ]
+            with self.lock:
+                pool = self.pools.get(key)
+                if pool is not None:
+                    pool.extend(tokens)
+
+
+class PoolStats(object):
+    """
+    Connection reuse and checkout wait time of the connection pools of one
+    adapter.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.new_connections = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, reused, wait):
+        with self.lock:
+            self.checkouts += 1
+            if not reused:
+                self.new_connections += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def snapshot(self):
+        with self.lock:
+            reused = self.checkouts - self.new_connections
+            return {
+                "checkouts": self.checkouts,
+                "new_connections": self.new_connections,
+                "reuse_ratio": reused / self.checkouts if self.checkouts else None,
+                "wait_seconds": self.wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+def _instrumented_pool(pool_class, stats):
+    """
+    Return a subclass of pool_class recording every connection checkout in
+    stats. A connection with an open socket is a reused keep-alive
+    connection.
+    """
+
+    class InstrumentedPool(pool_class):
+        def _get_conn(self, timeout=None):
+            start = time.perf_counter()
+            conn = super(InstrumentedPool, self)._get_conn(timeout)
+            reused = getattr(conn, "sock", None) is not None
+            stats.record(reused, time.perf_counter() - start)
+            return conn
+
+    return InstrumentedPool
+
+
 class BEAPAdapter(requests.adapters.HTTPAdapter):
     """
     Requests adapter for connectivity group token signing.
@@ -217,6 +395,10 @@ class BEAPAdapter(requests.adapters.HTTPAdapter):
         api_version="2",
         retry_max_attempt_number=3,
         retry_backoff_factor=1,
+        token_pool=None,
+        name="api",
+        timeout=None,
+        keep_alive=True,
         *args,
         **kwargs
     ):
@@ -231,6 +413,17 @@ class BEAPAdapter(requests.adapters.HTTPAdapter):
         :param retry_backoff_factor: Multiplier factor for exponential back-off strategy:
                {delay} = {backoff retry_backoff_factor} * (2 ** ({number of total retries} - 1))
         :type retry_backoff_factor: int
+        :param token_pool: Optional pool of pre-signed tokens
+        :type token_pool: ``TokenPool``
+        :param name: Name of the adapter's connection pools in ``stats``
+        :type name: str
+        :param timeout: Default (connect, read) timeout of requests sent without one
+        :type timeout: float or tuple
+        :param keep_alive: Keep connections open between requests
+        :type keep_alive: bool
+
+        ``pool_connections``, ``pool_maxsize`` and ``pool_block`` are passed on
+        to ``HTTPAdapter``.
         """
         logging.getLogger("urllib3.util.retry").setLevel(logging.DEBUG)
         retry_strategy = Retry(
@@ -238,9 +431,20 @@ class BEAPAdapter(requests.adapters.HTTPAdapter):
             status_forcelist=[429],
             backoff_factor=retry_backoff_factor,
         )
+        self.stats = PoolStats(name)
         super(BEAPAdapter, self).__init__(max_retries=retry_strategy, *args, **kwargs)
         self.credentials = credentials
         self.api_version = api_version
+        self.token_pool = token_pool
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(BEAPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _instrumented_pool(HTTPConnectionPool, self.stats),
+            "https": _instrumented_pool(HTTPSConnectionPool, self.stats),
+        }
 
     def send(self, request, **kwargs):
         """
@@ -254,16 +458,27 @@ class BEAPAdapter(requests.adapters.HTTPAdapter):
         :type: requests.Response
         """
         url = urlparse(request.url)
-        token = self.credentials.generate_token(url.path, request.method, url.hostname)
+        if self.token_pool is not None:
+            token = self.token_pool.get(url.path, request.method, url.hostname)
+        else:
+            token = self.credentials.generate_token(
+                url.path, request.method, url.hostname
+            )
         request.headers["JWT"] = token
         request.headers["api-version"] = self.api_version
-
-        LOG.info(
-            "Request being sent to HTTP server: %s, %s, %s",
-            request.method,
-            request.url,
-            request.headers,
-        )
+        if not self.keep_alive:
+            request.headers["Connection"] = "close"
+        if kwargs.get("timeout") is None and self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+
+        if LOG.isEnabledFor(logging.DEBUG):
+            headers = dict(request.headers, JWT="<redacted>")
+            LOG.debug(
+                "Request being sent to HTTP server: %s, %s, %s",
+                request.method,
+                request.url,
+                headers,
+            )
 
         response = super(BEAPAdapter, self).send(request, **kwargs)
 
@@ -305,11 +520,18 @@ class BEAPAdapter(requests.adapters.HTTPAdapter):
 
                 stream = kwargs.get("stream")
 
-                if not stream and LOG.isEnabledFor(logging.INFO):
-                    LOG.info("Response content: %s", response.text)
+                if not stream:
+                    log_body(
+                        LOG, logging.INFO, "Response content: %s", lambda: response.text
+                    )
 
         return response
 
+    def close(self):
+        if self.token_pool is not None:
+            self.token_pool.close()
+        super(BEAPAdapter, self).close()
+
 
 def download(session_, url_, out_path, chunk_size=2048, stream=True, headers=None):
     """
@@ -0,0 +1,65 @@
+"""
+Lazy, size-capped formatting of payload and response bodies for logging.
+
+Bodies are only rendered when a log record is actually emitted, are
+truncated to ``LOG_BODY_MAX_BYTES`` with a digest of the full content, and
+can be sampled with ``LOG_BODY_SAMPLE_RATE`` so that only a fraction of
+requests log their bodies at all.
+"""
+
+import hashlib
+import json
+import os
+import random
+
+LOG_BODY_MAX_BYTES = int(os.environ.get("LOG_BODY_MAX_BYTES", 2048))
+LOG_BODY_SAMPLE_RATE = float(os.environ.get("LOG_BODY_SAMPLE_RATE", 1.0))
+
+
+class LogBody(object):
+    """
+    Log argument that renders a body on demand.
+
+    ``body`` may be bytes, a string, any JSON serializable object or a
+    callable returning one of these, so that reading e.g. ``response.text``
+    is also deferred until the record is emitted.
+    """
+
+    __slots__ = ("body", "max_bytes")
+
+    def __init__(self, body, max_bytes=None):
+        self.body = body
+        self.max_bytes = LOG_BODY_MAX_BYTES if max_bytes is None else max_bytes
+
+    def __str__(self):
+        body = self.body() if callable(self.body) else self.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body, default=str).encode("utf-8")
+
+        if len(body) <= self.max_bytes:
+            return body.decode("utf-8", errors="replace")
+
+        return "{}... [truncated, {} bytes total, sha1={}]".format(
+            body[: self.max_bytes].decode("utf-8", errors="ignore"),
+            len(body),
+            hashlib.sha1(body).hexdigest(),
+        )
+
+
+def sampled(rate=None):
+    """
+    Return True for the configured fraction of calls.
+    """
+    rate = LOG_BODY_SAMPLE_RATE if rate is None else rate
+    return rate >= 1 or random.random() < rate
+
+
+def log_body(logger, level, msg, body, max_bytes=None):
+    """
+    Log ``msg`` with a lazily formatted, truncated body when ``level`` is
+    enabled for ``logger`` and the call is sampled.
+    """
+    if logger.isEnabledFor(level) and sampled():
+        logger.log(level, msg, LogBody(body, max_bytes), stacklevel=2)
@@ -7,6 +7,7 @@ All rights not expressly granted thereunder are hereby strictly reserved.
 
 import logging
 import re
+import socket
 from time import sleep
 import requests
 from retrying import retry
@@ -97,6 +98,7 @@ class SSEClient:
         self.event_iterator = None
         self.retry_interval = SSEClient.DEFAULT_RETRY_INTERVAL_IN_MS / 1000.0
         self.session = session
+        self.closed = False
         self._connect()
 
     def bounce_connection(self, sleep_after_disconnect):
@@ -125,6 +127,23 @@ class SSEClient:
         self.event_iterator = self._iter_events()
         self.event_source.raise_for_status()
 
+    def close(self):
+        """
+        Disconnect for good: reading fails from now on instead of
+        reconnecting.
+        """
+        self.closed = True
+        # Shut the socket down first: closing the response blocks while
+        # another thread is reading the stream.
+        connection = getattr(self.event_source.raw, "connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.disconnect()
+
     def disconnect(self):
         LOG.info("Closing the connection to the SSE server on %s", self.url)
         try:
@@ -163,11 +182,15 @@ class SSEClient:
             self.last_id = event.event_id or self.last_id
             return event
         except requests.exceptions.ChunkedEncodingError:
+            if self.closed:
+                raise EOFError("SSE client closed")
             LOG.info("Connection to SSE server dropped. " "Will attempt to reconnect")
 
             self.bounce_connection(sleep_after_disconnect=self.retry_interval)
             raise
         except Exception:
+            if self.closed:
+                raise EOFError("SSE client closed")
             LOG.exception("Error when reading event from the SSE server")
             self.bounce_connection(sleep_after_disconnect=self.retry_interval)
             raise
@@ -0,0 +1,184 @@
+"""
+Benchmark suite runner.
+
+    python -m benchmarks run [--sizes 10k,100k] [--only sse.] [--jobs 4]
+                             [--repeat 5] [--output results.json]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.2]
+
+run times every benchmark (best of --repeat) and writes a JSON document
+that can be kept as a baseline; benchmarks/baseline.json is the committed
+one. --jobs prepares the inputs in parallel processes, the timed sections
+still run one at a time. compare exits with status 1 when a
+benchmark is slower than its baseline by more than the threshold.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.suite import BENCHMARKS
+
+
+class TimingGate:
+    """
+    Shared between the worker processes of --jobs: inputs are prepared in
+    parallel, but a timed section waits for the running preparations and
+    holds the gate alone, so nothing competes with it for the CPU.
+    """
+
+    def __init__(self, manager):
+        self.condition = manager.Condition()
+        self.preparing = manager.Value("i", 0)
+        self.waiting = manager.Value("i", 0)
+        self.timing = manager.Value("b", False)
+
+    @contextlib.contextmanager
+    def prepare(self):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: not self.timing.value and not self.waiting.value
+            )
+            self.preparing.value += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.preparing.value -= 1
+                self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def time(self):
+        with self.condition:
+            self.waiting.value += 1
+            self.condition.wait_for(
+                lambda: not self.timing.value and not self.preparing.value
+            )
+            self.waiting.value -= 1
+            self.timing.value = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.timing.value = False
+                self.condition.notify_all()
+
+
+def time_benchmark(name, size, repeat, gate=None):
+    func, _ = BENCHMARKS[name]
+    try:
+        with gate.prepare() if gate else contextlib.nullcontext():
+            target = func(size)
+    except ImportError as err:
+        return {"name": name, "size": size, "skipped": str(err)}
+
+    timings = []
+    with gate.time() if gate else contextlib.nullcontext():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            target()
+            timings.append(time.perf_counter() - start)
+    return {"name": name, "size": size, "seconds": min(timings), "runs": timings}
+
+
+def run(args):
+    sizes = set(args.sizes.split(",")) if args.sizes else None
+    cases = [
+        (name, size)
+        for name, (_, bench_sizes) in BENCHMARKS.items()
+        if not args.only or name.startswith(args.only)
+        for size in bench_sizes
+        if sizes is None or size in sizes
+    ]
+
+    if args.jobs > 1:
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(
+            args.jobs
+        ) as executor:
+            gate = TimingGate(manager)
+            futures = [
+                executor.submit(time_benchmark, name, size, args.repeat, gate)
+                for name, size in cases
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [time_benchmark(name, size, args.repeat) for name, size in cases]
+
+    for result in results:
+        label = f"{result['name']:<36} {result['size']:>6}"
+        if "skipped" in result:
+            print(f"{label}  skipped: {result['skipped']}")
+        else:
+            print(f"{label}  {result['seconds']:.4f}s")
+
+    document = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {f"{r['name']}[{r['size']}]": r for r in results},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+    return 0
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    for key, result in sorted(current.items()):
+        base = baseline.get(key)
+        if not base or "seconds" not in base or "seconds" not in result:
+            continue
+
+        change = result["seconds"] / base["seconds"] - 1
+        flag = ""
+        if change > args.threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(
+            f"{key:<44} {base['seconds']:.4f}s -> {result['seconds']:.4f}s "
+            f"({change:+.1%}){flag}"
+        )
+
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than "
+            f"{args.threshold:.0%}"
+        )
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--sizes", help="comma separated, e.g. 10k,1mb")
+    run_parser.add_argument("--only", help="benchmark name prefix")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--jobs", type=int, default=1)
+    run_parser.add_argument("--output")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
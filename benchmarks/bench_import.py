@@ -0,0 +1,90 @@
+"""
+Import time of the entry modules, measured in fresh interpreters, against a
+budget.
+
+A dry run (python -m app.main --dry-run) only imports app.main, so its import
+time is what short invocations pay before doing any work. The slowest
+modules reported by -X importtime are printed to find what crept in.
+
+Usage: python -m benchmarks.bench_import [--budget-ms 250] [--repeat 5]
+                                         [module ...]
+
+Exits with status 1 when the best import time of a module exceeds the budget.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("BBG_CRED", "{}")
+    return env
+
+
+def import_seconds(module, repeat):
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(module=module)],
+            capture_output=True,
+            check=True,
+            env=_env(),
+            text=True,
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def slowest_imports(module, count=10):
+    """
+    Return the count modules with the largest cumulative import time, in
+    microseconds, as reported by -X importtime.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        env=_env(),
+        text=True,
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_import")
+    parser.add_argument("modules", nargs="*", default=["app.main"])
+    parser.add_argument("--budget-ms", type=float, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    over_budget = []
+    for module in args.modules:
+        milliseconds = import_seconds(module, args.repeat) * 1000
+        flag = ""
+        if milliseconds > args.budget_ms:
+            over_budget.append(module)
+            flag = "  OVER BUDGET"
+        print(f"{module:<24} {milliseconds:>8.1f}ms / {args.budget_ms:.0f}ms{flag}")
+        for cumulative, name in slowest_imports(module):
+            print(f"    {cumulative / 1000:>8.1f}ms  {name}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Per-request logging overhead of payload and response bodies.
+
+Compares the previous behaviour (pprint/full body formatted on every
+request) with beap.log_body at INFO and at WARNING level.
+
+Usage: python -m benchmarks.bench_logging [identifiers] [repeat]
+"""
+
+import io
+import json
+import logging
+import pprint
+import sys
+import time
+
+from beap.log_body import log_body
+
+
+def make_payload(size):
+    return {
+        "@type": "Universe",
+        "identifier": "u20230101000000abcdef",
+        "contains": [
+            {
+                "@type": "Identifier",
+                "identifierType": "ISIN",
+                "identifierValue": "US%010d" % i,
+            }
+            for i in range(size)
+        ],
+    }
+
+
+def make_logger(level):
+    logger = logging.getLogger("bench_logging")
+    logger.handlers = [logging.StreamHandler(io.StringIO())]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(size=10000, repeat=20):
+    payload = make_payload(size)
+    text = json.dumps(payload)
+    results = {}
+
+    for level in (logging.INFO, logging.WARNING):
+        logger = make_logger(level)
+        name = logging.getLevelName(level).lower()
+        results["pformat_" + name] = timeit(
+            lambda: logger.info("Payload:\n%s", pprint.pformat(payload)), repeat
+        )
+        results["response_text_" + name] = timeit(
+            lambda: logger.info("Response content: %s", text), repeat
+        )
+        results["log_body_" + name] = timeit(
+            lambda: log_body(logger, logging.INFO, "Payload:\n%s", payload), repeat
+        )
+        results["log_body_response_" + name] = timeit(
+            lambda: log_body(logger, logging.INFO, "Response content: %s", text),
+            repeat,
+        )
+
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    size = int(argv[0]) if argv else 10000
+    repeat = int(argv[1]) if len(argv) > 1 else 20
+    for name, seconds in run(size, repeat).items():
+        print("{:<28} {:>10.3f} ms/request".format(name, seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
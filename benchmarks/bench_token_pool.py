@@ -0,0 +1,101 @@
+"""
+Requests per second through BEAPAdapter.send with and without TokenPool.
+
+The transport is replaced by a stub returning an empty 200 response, so
+the numbers only measure signing and adapter overhead. The pool is measured
+with the default JWT_POOL_SIZE, then with a size derived from the request
+rate observed with it: the tokens taken per refill interval.
+
+Usage: python -m benchmarks.bench_token_pool [requests] [threads]
+"""
+
+import binascii
+import logging
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import requests.adapters
+
+from beap.beap_auth import JWT_POOL_SIZE, BEAPAdapter, Credentials, TokenPool
+
+URL = "https://api.bloomberg.com/eap/catalogs/123456/requests/"
+
+
+def stub_send(self, request, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.request = request
+    response.url = request.url
+    return response
+
+
+def make_credentials():
+    return Credentials("bench", binascii.unhexlify("00" * 32))
+
+
+def measure(adapter, count, threads):
+    request = requests.Request("POST", URL).prepare()
+
+    def send(_):
+        adapter.send(request.copy(), stream=True)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(send, range(count)))
+    return count / (time.perf_counter() - start)
+
+
+def run(count=2000, threads=8):
+    logging.getLogger("beap.beap_auth").setLevel(logging.WARNING)
+    original = requests.adapters.HTTPAdapter.send
+    requests.adapters.HTTPAdapter.send = stub_send
+    try:
+        credentials = make_credentials()
+        results = {"without_pool": measure(BEAPAdapter(credentials), count, threads)}
+
+        default = measure_pool(credentials, JWT_POOL_SIZE, count, threads)
+        results["with_pool"], results["pool_hit_ratio"], refill_interval = default
+        size = max(1, math.ceil(results["with_pool"] * refill_interval))
+        results["sized_pool_size"] = size
+        sized = measure_pool(credentials, size, count, threads)
+        results["with_sized_pool"], results["sized_pool_hit_ratio"], _ = sized
+        return results
+    finally:
+        requests.adapters.HTTPAdapter.send = original
+
+
+def measure_pool(credentials, size, count, threads):
+    """
+    Return the requests per second, hit ratio and refill interval of a
+    TokenPool of size tokens, once its key is pre-signed.
+    """
+    pool = TokenPool(credentials, size=size)
+    for _ in range(pool.min_requests):
+        pool.get(*_key())
+    time.sleep(pool.refill_interval * 1.5)
+    adapter = BEAPAdapter(credentials, token_pool=pool)
+    try:
+        rate = measure(adapter, count, threads)
+    finally:
+        adapter.close()
+    return rate, pool.hits / max(pool.hits + pool.misses, 1), pool.refill_interval
+
+
+def _key():
+    url = requests.utils.urlparse(URL)
+    return url.path, "POST", url.hostname
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 2000
+    threads = int(argv[1]) if len(argv) > 1 else 8
+    for name, value in run(count, threads).items():
+        print("{:<16} {:>12.2f}".format(name, value))
+
+
+if __name__ == "__main__":
+    main()
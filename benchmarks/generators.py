@@ -0,0 +1,105 @@
+"""
+Synthetic inputs for the benchmark suite. Every generator is seeded so
+repeated runs measure the same data.
+"""
+
+import datetime
+import gzip
+import json
+import random
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+STREAM_SIZES = {"1mb": 1 << 20, "10mb": 10 << 20}
+
+
+def parse_size(size):
+    return SIZES.get(size) or STREAM_SIZES.get(size) or int(size)
+
+
+def tickers(count, seed=0):
+    rng = random.Random(seed)
+    return ["US%010d" % rng.randrange(10**10) for _ in range(count)]
+
+
+def reply_rows(count, seed=0):
+    """
+    Rows shaped like a parsed EOD reply, with the date formats and gaps
+    the transforms have to handle.
+    """
+    rng = random.Random(seed)
+    base = datetime.datetime(2023, 1, 2)
+    rows = []
+    for i, ticker in enumerate(tickers(count, seed)):
+        moment = base + datetime.timedelta(seconds=rng.randrange(86400 * 30))
+        kind = i % 4
+        if kind == 0:
+            last_update = moment.strftime("%H:%M:%S")
+        elif kind == 1:
+            last_update = moment.strftime("%Y-%m-%d %H:%M:%S")
+        elif kind == 2:
+            last_update = moment.strftime("%Y%m%d")
+        else:
+            last_update = None
+
+        rows.append(
+            {
+                "DL_REQUEST_ID": "r20230102000000abcdef",
+                "DL_REQUEST_NAME": "eod",
+                "DL_SNAPSHOT_START_TIME": "2023-01-02T22:00:00",
+                "DL_SNAPSHOT_TZ": "UTC",
+                "IDENTIFIER": ticker,
+                "RC": 0 if rng.random() > 0.01 else 9,
+                "PX_LAST": round(rng.uniform(1, 500), 4),
+                "VOLUME": rng.randrange(10**7),
+                "LAST_UPDATE": last_update,
+                "LAST_UPDATE_DT": moment.strftime("%Y-%m-%d"),
+                "LAST_TRADE_DATE": moment.strftime("%Y-%m-%d"),
+                "LAST_TRADE_TIME": moment.strftime("%H:%M:%S"),
+                "LAST_TRADE": moment.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+    return rows
+
+
+def reply_gzip(count, seed=0):
+    return gzip.compress(json.dumps(reply_rows(count, seed)).encode("utf-8"))
+
+
+def sse_stream(size, chunk_size=8192, seed=0):
+    """
+    Raw SSE bytes of roughly size bytes, split into transport chunks, with a
+    mix of heartbeats and delivery notifications.
+    """
+    rng = random.Random(seed)
+    events = []
+    total = 0
+    i = 0
+    while total < size:
+        if i % 5 == 0:
+            event = ":heartbeat\n\n"
+        else:
+            data = json.dumps(
+                {
+                    "generated": {
+                        "@id": "/eap/catalogs/123456/datasets/x/distributions/r%d.json"
+                        % i,
+                        "identifier": "r%d.json" % i,
+                        "snapshot": {"dataset": {"catalog": {"identifier": "123456"}}},
+                        "padding": "x" * rng.randrange(50, 500),
+                    }
+                }
+            )
+            event = "id: %d\nevent: message\ndata: %s\n\n" % (i, data)
+        events.append(event.encode("utf-8"))
+        total += len(events[-1])
+        i += 1
+
+    stream = b"".join(events)
+    return [stream[i : i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+
+def sse_events(size, seed=0):
+    """
+    Decoded SSE event strings, as yielded by SSEClient._iter_events.
+    """
+    return b"".join(sse_stream(size, seed=seed)).decode("utf-8").split("\n\n")[:-1]
@@ -0,0 +1,141 @@
+"""
+Benchmarks of the hot paths. Each benchmark takes a size name, prepares its
+input outside of the timed section and returns a callable to time.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+from benchmarks import generators
+
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes):
+    def register(func):
+        BENCHMARKS[name] = (func, sizes)
+        return func
+
+    return register
+
+
+ROW_SIZES = ("10k", "100k", "1m")
+STREAM_SIZES = ("1mb", "10mb")
+
+
+@benchmark("utils.to_date", ROW_SIZES)
+def utils_to_date(size):
+    from app.utils import Utils
+
+    rows = generators.reply_rows(generators.parse_size(size))
+    return lambda: [Utils.to_date(row) for row in rows]
+
+
+@benchmark("utils.reformat_last_update", ROW_SIZES)
+def utils_reformat_last_update(size):
+    from app.utils import Utils
+
+    rows = generators.reply_rows(generators.parse_size(size))
+    return lambda: [Utils._reformat_last_update(row) for row in rows]
+
+
+@benchmark("sse.parse", STREAM_SIZES)
+def sse_parse(size):
+    from beap.sseclient import SSEEvent
+
+    events = generators.sse_events(generators.parse_size(size))
+    return lambda: [SSEEvent(event) for event in events]
+
+
+@benchmark("sse.iter_events", STREAM_SIZES)
+def sse_iter_events(size):
+    from beap.sseclient import SSEClient
+
+    chunks = generators.sse_stream(generators.parse_size(size))
+    sse_client = SSEClient.__new__(SSEClient)
+
+    def run():
+        sse_client.event_source = iter(chunks)
+        return list(sse_client._iter_events())
+
+    return run
+
+
+@benchmark("client.parse_reply", ROW_SIZES)
+def client_parse_reply(size):
+    import pandas  # noqa: F401
+
+    from app.client import Client
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "reply.json.gz")
+    with open(path, "wb") as f:
+        f.write(generators.reply_gzip(generators.parse_size(size)))
+    atexit.register(shutil.rmtree, os.path.dirname(path), True)
+    return lambda: Client.parse_reply(path)
+
+
+@benchmark("eod.generate_identifier_values", ROW_SIZES)
+def eod_generate_identifier_values(size):
+    client = _eod_client()
+    tickers = generators.tickers(generators.parse_size(size))
+    return lambda: client.generate_identifier_values(tickers)
+
+
+@benchmark("eod.encode_identifier_values", ROW_SIZES)
+def eod_encode_identifier_values(size):
+    client = _eod_client()
+    tickers = generators.tickers(generators.parse_size(size))
+    return lambda: client.encode_identifier_values(tickers)
+
+
+@benchmark("identifiers.from_frame", ROW_SIZES)
+def identifiers_from_frame(size):
+    import pandas as pd
+
+    from app.identifiers import IdentifierStore
+
+    count = generators.parse_size(size)
+    df = pd.DataFrame(
+        {"bbg_comp_ticker": generators.tickers(count), "instrument_id": range(count)}
+    )
+    return lambda: IdentifierStore.from_frame(df)
+
+
+@benchmark("identifiers.join", ROW_SIZES)
+def identifiers_join(size):
+    import pandas as pd
+
+    from app.identifiers import IdentifierStore
+
+    tickers = generators.tickers(generators.parse_size(size))
+    store = IdentifierStore.from_frame(
+        pd.DataFrame({"bbg_comp_ticker": tickers, "instrument_id": range(len(tickers))})
+    )
+    # Reply order differs from the input order.
+    identifiers = tickers[::-1]
+    return lambda: store.join(pd.DataFrame({"IDENTIFIER": identifiers}), "IDENTIFIER")
+
+
+@benchmark("mssql.column_types", ROW_SIZES)
+def mssql_column_types(size):
+    import pandas as pd
+
+    for name in ("SERVER", "DATABASE", "USERNAME", "PASSWORD"):
+        os.environ.setdefault(f"MSSQL_{name}", "benchmark")
+    from db.mssql import MSSQLDatabase
+
+    df = pd.DataFrame(generators.reply_rows(generators.parse_size(size)))
+    field_types = {"PX_LAST": "Price", "VOLUME": "Integer"}
+    return lambda: MSSQLDatabase.column_types(df, field_types)
+
+
+def _eod_client():
+    from app.eod.client import Client
+    from app.utils import Utils
+
+    client = Client.__new__(Client)
+    client.config = {"is_identifier_isin": True}
+    client.utils = Utils()
+    return client
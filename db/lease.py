@@ -0,0 +1,326 @@
+import abc
+import json
+import logging
+import sqlite3
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] [%(name)s:%(lineno)s]: %(message)s",
+)
+
+
+class ShardStore(abc.ABC):
+    """
+    Lease table for identifier shards and staging table for their output.
+
+    Workers claim shards with a compare-and-set UPDATE, so the same SQL
+    works on SQLite (local stand-in) and MSSQL (production). Expired leases
+    of dead workers are claimable again.
+    """
+
+    LEASE_TABLE = "shard_leases"
+
+    @abc.abstractmethod
+    def connect(self):
+        """
+        Return a new DB-API connection to the store.
+        """
+
+    @abc.abstractmethod
+    def create_lease_table(self, cursor):
+        """
+        Create the lease table if it does not exist.
+        """
+
+    @abc.abstractmethod
+    def quote(self, table):
+        """
+        Return table as an identifier usable in a query.
+        """
+
+    @abc.abstractmethod
+    def write_stage(self, df, stage_table, run_id, shard_id, owner, lease_sec):
+        """
+        Replace the staged rows of a shard with df, provided owner still
+        holds its lease, which is renewed in the same transaction.
+
+        :return: bool, False if the lease was lost and nothing was written.
+        """
+
+    def _hold(self, cursor, run_id, shard_id, owner, lease_sec):
+        """
+        Renew the lease of owner inside the caller's transaction. The
+        UPDATE locks the lease row, so no claim can take the shard over
+        until the transaction ends.
+        """
+        cursor.execute(
+            f"UPDATE {self.LEASE_TABLE} SET lease_expires = ? "
+            "WHERE run_id = ? AND shard_id = ? AND owner = ? "
+            "AND status = 'leased'",
+            (time.time() + lease_sec, run_id, shard_id, owner),
+        )
+        return cursor.rowcount == 1
+
+    def execute(self, query, params=(), fetch=False):
+        cnx = self.connect()
+        try:
+            cursor = cnx.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall() if fetch else cursor.rowcount
+            cnx.commit()
+            return rows
+        finally:
+            cnx.close()
+
+    def setup(self):
+        cnx = self.connect()
+        try:
+            self.create_lease_table(cnx.cursor())
+            cnx.commit()
+        finally:
+            cnx.close()
+
+    def create_run(self, run_id, shards):
+        """
+        Register the shards of a run. Shards that already exist are kept, so
+        restarting the coordinator does not reset progress.
+
+        :param run_id: str, identifier shared by the coordinator and workers.
+        :param shards: list of lists, identifiers of every shard.
+        """
+        existing = {
+            row[0]
+            for row in self.execute(
+                f"SELECT shard_id FROM {self.LEASE_TABLE} WHERE run_id = ?",
+                (run_id,),
+                fetch=True,
+            )
+        }
+        for shard_id, tickers in enumerate(shards):
+            if shard_id in existing:
+                continue
+            self.execute(
+                f"INSERT INTO {self.LEASE_TABLE} "
+                "(run_id, shard_id, tickers, status, owner, lease_expires) "
+                "VALUES (?, ?, ?, 'pending', NULL, 0)",
+                (run_id, shard_id, json.dumps(tickers)),
+            )
+
+    def claim(self, run_id, owner, lease_sec):
+        """
+        Lease a pending shard or one whose lease expired.
+
+        :return: tuple (shard_id, tickers) or None if nothing is claimable.
+        """
+        while True:
+            now = time.time()
+            rows = self.execute(
+                f"SELECT shard_id, tickers, lease_expires FROM {self.LEASE_TABLE} "
+                "WHERE run_id = ? AND (status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?)) "
+                "ORDER BY shard_id",
+                (run_id, now),
+                fetch=True,
+            )
+            if not rows:
+                return None
+
+            shard_id, tickers, expires = rows[0]
+            claimed = self.execute(
+                f"UPDATE {self.LEASE_TABLE} "
+                "SET status = 'leased', owner = ?, lease_expires = ? "
+                "WHERE run_id = ? AND shard_id = ? AND status != 'done' "
+                "AND lease_expires = ?",
+                (owner, now + lease_sec, run_id, shard_id, expires),
+            )
+            if claimed == 1:
+                return shard_id, json.loads(tickers)
+
+    def renew(self, run_id, shard_id, owner, lease_sec):
+        return (
+            self.execute(
+                f"UPDATE {self.LEASE_TABLE} SET lease_expires = ? "
+                "WHERE run_id = ? AND shard_id = ? AND owner = ? "
+                "AND status = 'leased'",
+                (time.time() + lease_sec, run_id, shard_id, owner),
+            )
+            == 1
+        )
+
+    def complete(self, run_id, shard_id, owner):
+        return (
+            self.execute(
+                f"UPDATE {self.LEASE_TABLE} SET status = 'done' "
+                "WHERE run_id = ? AND shard_id = ? AND owner = ?",
+                (run_id, shard_id, owner),
+            )
+            == 1
+        )
+
+    def release(self, run_id, shard_id, owner):
+        """
+        Hand a leased shard back as pending, so it is claimed again without
+        waiting for the lease to expire.
+        """
+        return (
+            self.execute(
+                f"UPDATE {self.LEASE_TABLE} "
+                "SET status = 'pending', owner = NULL, lease_expires = 0 "
+                "WHERE run_id = ? AND shard_id = ? AND owner = ? "
+                "AND status = 'leased'",
+                (run_id, shard_id, owner),
+            )
+            == 1
+        )
+
+    def remaining(self, run_id):
+        rows = self.execute(
+            f"SELECT COUNT(*) FROM {self.LEASE_TABLE} "
+            "WHERE run_id = ? AND status != 'done'",
+            (run_id,),
+            fetch=True,
+        )
+        return rows[0][0]
+
+    def publish(self, stage_table, output_table, run_id):
+        """
+        Replace the output table with the staged rows of a run in a single
+        transaction and drop them from the staging table.
+        """
+        cnx = self.connect()
+        try:
+            cursor = cnx.cursor()
+            stage, output = self.quote(stage_table), self.quote(output_table)
+            cursor.execute(f"SELECT * FROM {stage} WHERE 1 = 0")
+            columns = [
+                c[0] for c in cursor.description if c[0] not in ("_run_id", "_shard_id")
+            ]
+            column_list = ",".join(f"[{c}]" for c in columns)
+            cursor.execute(f"DELETE FROM {output}")
+            cursor.execute(
+                f"INSERT INTO {output} ({column_list}) "
+                f"SELECT {column_list} FROM {stage} WHERE _run_id = ?",
+                (run_id,),
+            )
+            published = cursor.rowcount
+            cursor.execute(f"DELETE FROM {stage} WHERE _run_id = ?", (run_id,))
+            cnx.commit()
+        except Exception:
+            cnx.rollback()
+            raise
+        finally:
+            cnx.close()
+
+        logging.info(f"Published {published} rows from {stage_table} to {output_table}")
+        return published
+
+    @staticmethod
+    def _tag(df, run_id, shard_id):
+        df = df.copy()
+        df["_run_id"] = run_id
+        df["_shard_id"] = shard_id
+        return df
+
+
+class SQLiteShardStore(ShardStore):
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create_lease_table(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.LEASE_TABLE} ("
+            "run_id TEXT, shard_id INTEGER, tickers TEXT, status TEXT, "
+            "owner TEXT, lease_expires REAL, PRIMARY KEY (run_id, shard_id))"
+        )
+
+    def quote(self, table):
+        return '"{}"'.format(table.replace('"', '""'))
+
+    def write_stage(self, df, stage_table, run_id, shard_id, owner, lease_sec):
+        cnx = self.connect()
+        try:
+            cursor = cnx.cursor()
+            if not self._hold(cursor, run_id, shard_id, owner, lease_sec):
+                cnx.rollback()
+                return False
+
+            exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (stage_table,),
+            ).fetchone()
+            if exists:
+                cursor.execute(
+                    f"DELETE FROM {self.quote(stage_table)} "
+                    "WHERE _run_id = ? AND _shard_id = ?",
+                    (run_id, shard_id),
+                )
+            self._tag(df, run_id, shard_id).to_sql(
+                stage_table, cnx, if_exists="append", index=False
+            )
+            cnx.commit()
+            return True
+        except Exception:
+            cnx.rollback()
+            raise
+        finally:
+            cnx.close()
+
+
+class MSSQLShardStore(ShardStore):
+    def __init__(self):
+        from db import mssql
+
+        self.database = mssql.MSSQLDatabase.shared()
+
+    def connect(self):
+        import pyodbc
+
+        return pyodbc.connect(self.database.CNX_STRING)
+
+    def create_lease_table(self, cursor):
+        cursor.execute(
+            f"IF OBJECT_ID('{self.LEASE_TABLE}', 'U') IS NULL "
+            f"CREATE TABLE {self.LEASE_TABLE} ("
+            "run_id varchar(100), shard_id int, tickers varchar(max), "
+            "status varchar(10), owner varchar(100), lease_expires float, "
+            "PRIMARY KEY (run_id, shard_id))"
+        )
+
+    def quote(self, table):
+        return self.database.quote(table)
+
+    def write_stage(self, df, stage_table, run_id, shard_id, owner, lease_sec):
+        from fast_to_sql import fast_to_sql
+
+        cnx = self.connect()
+        try:
+            cursor = cnx.cursor()
+            if not self._hold(cursor, run_id, shard_id, owner, lease_sec):
+                cnx.rollback()
+                return False
+
+            cursor.execute(
+                f"IF OBJECT_ID('{stage_table}', 'U') IS NOT NULL "
+                f"DELETE FROM {self.quote(stage_table)} "
+                "WHERE _run_id = ? AND _shard_id = ?",
+                (run_id, shard_id),
+            )
+            df = self._tag(df, run_id, shard_id)
+            fast_to_sql.fast_to_sql(
+                df=df,
+                name=stage_table,
+                conn=cnx,
+                if_exists="append",
+                custom=self.database.column_types(df),
+            )
+            cnx.commit()
+            return True
+        except Exception:
+            cnx.rollback()
+            raise
+        finally:
+            cnx.close()
@@ -1,13 +1,12 @@
+import contextlib
 import logging
+import queue
+import time
 import urllib
 import warnings
 
-import numpy as np
 import pandas as pd
-import pyodbc
 from decouple import config
-from fast_to_sql import fast_to_sql
-from sqlalchemy import create_engine
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,25 +14,89 @@ logging.basicConfig(
 )
 warnings.filterwarnings("ignore")
 
+NUMERIC_FIELD_TYPES = {"integer": "bigint", "real": "float", "price": "float"}
+TEXT_FIELD_TYPES = {"long character": "varchar(max)", "bulk format": "varchar(max)"}
+
 
 class MSSQLDatabase(object):
-    SERVER = config("MSSQL_SERVER", cast=str)
-    DATABASE = config("MSSQL_DATABASE", cast=str)
-    USERNAME = config("MSSQL_USERNAME", cast=str)
-    PASSWORD = config("MSSQL_PASSWORD", cast=str)
+    _shared = None
 
-    CNX_STRING = (
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        f"SERVER={SERVER};DATABASE={DATABASE};UID={USERNAME};PWD={PASSWORD}"
-    )
+    def __init__(self, pool_size=None, pool_idle_sec=None):
+        self.CNX_STRING = (
+            "DRIVER={ODBC Driver 17 for SQL Server};"
+            f"SERVER={config('MSSQL_SERVER', cast=str)};"
+            f"DATABASE={config('MSSQL_DATABASE', cast=str)};"
+            f"UID={config('MSSQL_USERNAME', cast=str)};"
+            f"PWD={config('MSSQL_PASSWORD', cast=str)}"
+        )
+        self.PARSED_CNX_URL = urllib.parse.quote_plus(self.CNX_STRING)
+        self._engine = None
+        self.pool_size = pool_size or config("MSSQL_POOL_SIZE", cast=int, default=4)
+        self.pool_idle_sec = pool_idle_sec or config(
+            "MSSQL_POOL_IDLE_SEC", cast=int, default=600
+        )
+        self.idle = queue.LifoQueue()
 
-    PARSED_CNX_URL = urllib.parse.quote_plus(CNX_STRING)
+    @property
+    def engine(self):
+        """
+        SQLAlchemy engine, created on first use.
+        """
+        if self._engine is None:
+            from sqlalchemy import create_engine
 
-    def __init__(self):
-        self.engine = create_engine(
-            f"mssql+pyodbc:///?odbc_connect={self.PARSED_CNX_URL}"
-        )
-        self.cnx = None
+            self._engine = create_engine(
+                f"mssql+pyodbc:///?odbc_connect={self.PARSED_CNX_URL}"
+            )
+        return self._engine
+
+    @classmethod
+    def shared(cls):
+        """
+        Return a process-wide instance so its pool of ODBC connections is
+        reused across runs.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Check out a connection for one unit of work, so concurrent callers
+        never share one. The caller commits; if the block raises, the
+        connection is rolled back and discarded. Otherwise it is kept open
+        for the next caller, up to pool_size idle connections, and closed
+        once idle for more than pool_idle_sec.
+        """
+        cnx = self._checkout()
+        try:
+            yield cnx
+        except Exception:
+            with contextlib.suppress(Exception):
+                cnx.rollback()
+            with contextlib.suppress(Exception):
+                cnx.close()
+            raise
+
+        if self.idle.qsize() < self.pool_size:
+            self.idle.put((cnx, time.monotonic()))
+        else:
+            cnx.close()
+
+    def _checkout(self):
+        while True:
+            try:
+                cnx, returned_at = self.idle.get_nowait()
+            except queue.Empty:
+                import pyodbc
+
+                return pyodbc.connect(self.CNX_STRING)
+
+            if time.monotonic() - returned_at < self.pool_idle_sec:
+                return cnx
+            with contextlib.suppress(Exception):
+                cnx.close()
 
     def select_table(self, table_name, columns=None, where=None):
         """
@@ -43,7 +106,6 @@ class MSSQLDatabase(object):
         :param columns: list of str, columns to include in the result, default is None (all columns).
         :return: DataFrame, containing the selected data.
         """
-        self.reopen_connection()
         if columns:
             fcolumns = ",".join(columns)
         else:
@@ -54,46 +116,244 @@ class MSSQLDatabase(object):
             query = f"{query} {where}"
 
         logging.info(query)
-        df = pd.read_sql(query, self.cnx)
+        with self.connection() as cnx:
+            df = pd.read_sql(query, cnx)
         logging.info(f"Selected {len(df)} rows from {table_name} table")
-        self.cnx.close()
         return df
 
-    def insert_table(self, df, table_name, if_exists="append"):
+    def insert_table(
+        self, df, table_name, if_exists="append", field_types=None, replace_on=None
+    ):
         """
         Insert a DataFrame into a database table, with optional behavior if the table exists.
 
         :param df: DataFrame, containing data to insert into the table.
         :param table_name: str, name of the table to insert data into.
         :param if_exists: str, behavior if the table exists, default is 'append'.
+        :param field_types: dict, Bloomberg datatype per column used to pick column types.
+        :param replace_on: str or list of str, key column(s); when set only rows with the keys in df are deleted.
+
+        """
+        from fast_to_sql import fast_to_sql
+
+        custom = self.column_types(df, field_types)
+        with self.connection() as cnx:
+            if if_exists == "append":
+                cursor = cnx.cursor()
+                if replace_on:
+                    self.delete_keys(cursor, table_name, replace_on, df)
+                else:
+                    query = f"DELETE FROM {table_name}"
+                    cursor.execute(query)
+
+            fast_to_sql.fast_to_sql(
+                df=df, name=table_name, conn=cnx, if_exists=if_exists, custom=custom
+            )
+            cnx.commit()
+        logging.info(f"Inserted {len(df)} rows into {table_name} table")
+
+    def insert_table_batched(
+        self,
+        df,
+        table_name,
+        run_id,
+        checkpoint,
+        batch_size=50000,
+        field_types=None,
+        replace_on=None,
+        retries=3,
+    ):
+        """
+        Insert a DataFrame in committed batches through a staging table, then
+        publish it to the target table in one transaction.
+
+        Committed batch offsets are recorded in the checkpoint, so a retry
+        after a transient error, or a rerun of the same run_id with the same
+        rows (timestamp columns aside), continues from the last committed batch.
+
+        :param df: DataFrame, containing data to insert into the table.
+        :param table_name: str, name of the target table.
+        :param run_id: str, stable identifier of the data, e.g. app and as-of date.
+        :param checkpoint: object with load(), save(state) and clear() methods.
+        :param batch_size: int, rows per committed batch, default is 50000.
+        :param field_types: dict, Bloomberg datatype per column used to pick column types.
+        :param replace_on: str or list of str, key column(s); when set only rows with the keys in df are replaced.
+        :param retries: int, attempts per batch on database errors, default is 3.
+        """
+        staging = f"{table_name}_stage_{run_id}"
+        digest = self.digest(df)
+        state = checkpoint.load()
+        if (state.get("run_id"), state.get("digest")) != (run_id, digest):
+            if state.get("staging"):
+                self._drop_table(state["staging"])
+            state = {
+                "run_id": run_id,
+                "digest": digest,
+                "staging": staging,
+                "rows": len(df),
+                "offset": 0,
+            }
+            checkpoint.save(state)
+        elif state["offset"]:
+            logging.info(f"Resuming insert into {staging} at row {state['offset']}")
 
+        import pyodbc
+        from fast_to_sql import fast_to_sql
+
+        custom = self.column_types(df, field_types)
+        while state["offset"] < len(df):
+            batch = df.iloc[state["offset"] : state["offset"] + batch_size]
+            for attempt in range(1, retries + 1):
+                try:
+                    with self.connection() as cnx:
+                        fast_to_sql.fast_to_sql(
+                            df=batch,
+                            name=staging,
+                            conn=cnx,
+                            if_exists="append",
+                            custom=custom,
+                        )
+                        cnx.commit()
+                    break
+                except pyodbc.Error:
+                    logging.exception(
+                        f"Batch at row {state['offset']} failed "
+                        f"(attempt {attempt}/{retries})"
+                    )
+                    if attempt == retries:
+                        raise
+                    time.sleep(2**attempt)
+
+            state["offset"] += len(batch)
+            checkpoint.save(state)
+            logging.info(f"Committed {state['offset']}/{len(df)} rows into {staging}")
+
+        self._publish(staging, table_name, df, replace_on)
+        checkpoint.clear()
+
+    @staticmethod
+    def digest(df):
+        """
+        Fingerprint of the rows of df, leaving out the timestamp columns that
+        change on every run, so a rerun with the same reply resumes.
+        """
+        columns = [c for c in df.columns if "timestamp" not in c.lower()]
+        return str(pd.util.hash_pandas_object(df[columns], index=False).sum())
+
+    @staticmethod
+    def quote(table_name):
+        return ".".join(f"[{part}]" for part in table_name.split("."))
+
+    def _publish(self, staging, table_name, df, replace_on=None):
+        with self.connection() as cnx:
+            cursor = cnx.cursor()
+            stage = self.quote(staging)
+            cursor.execute("SELECT OBJECT_ID(?, 'U')", (stage,))
+            if cursor.fetchone()[0] is None:
+                # The staging table is dropped in the publishing transaction:
+                # a run that stopped before clearing its checkpoint is done.
+                logging.info(f"{staging} was already published into {table_name}")
+                return
+
+            cursor.execute("SELECT OBJECT_ID(?, 'U')", (table_name,))
+            if cursor.fetchone()[0] is None:
+                cursor.execute(f"SELECT * INTO {table_name} FROM {stage}")
+            else:
+                if replace_on:
+                    self.delete_keys(cursor, table_name, replace_on, df)
+                else:
+                    cursor.execute(f"DELETE FROM {table_name}")
+                columns = ",".join(f"[{c}]" for c in df.columns)
+                cursor.execute(
+                    f"INSERT INTO {table_name} ({columns}) "
+                    f"SELECT {columns} FROM {stage}"
+                )
+            cursor.execute(f"DROP TABLE {stage}")
+            cnx.commit()
+
+        logging.info(f"Published {len(df)} rows from {staging} into {table_name}")
+
+    def _drop_table(self, table_name):
+        with self.connection() as cnx:
+            cnx.cursor().execute(f"DROP TABLE IF EXISTS {self.quote(table_name)}")
+            cnx.commit()
+
+    @staticmethod
+    def delete_keys(cursor, table_name, columns, keys, chunk_size=1000):
+        """
+        Delete the rows whose key columns hold values found in keys.
+
+        With several key columns, a row is deleted when each of its key values
+        is among the values of that column in keys, e.g. every (DATE,
+        IDENTIFIER) of a backfilled window and universe. Only the last column
+        is chunked, so the other columns should have few distinct values.
+
+        :param cursor: pyodbc cursor of the open transaction.
+        :param table_name: str, name of the table to delete rows from.
+        :param columns: str or list of str, key column(s).
+        :param keys: DataFrame, rows whose keys are deleted.
+        :param chunk_size: int, values of the last key column per DELETE statement, default is 1000.
+        """
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        fixed_clause = ""
+        fixed_values = []
+        for column in columns[:-1]:
+            values = list(dict.fromkeys(keys[column]))
+            fixed_clause += f"{column} IN ({','.join('?' * len(values))}) AND "
+            fixed_values.extend(values)
+
+        last = list(dict.fromkeys(keys[columns[-1]]))
+        for start in range(0, len(last), chunk_size):
+            chunk = last[start : start + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            query = (
+                f"DELETE FROM {table_name} "
+                f"WHERE {fixed_clause}{columns[-1]} IN ({placeholders})"
+            )
+            cursor.execute(query, fixed_values + chunk)
+
+    @staticmethod
+    def numeric_type(dtype):
+        """
+        Return the SQL type of a numeric or boolean dtype, numpy or nullable
+        (e.g. Int64 and boolean from convert_dtypes), or None.
+        """
+        if pd.api.types.is_bool_dtype(dtype):
+            return "bit"
+        if pd.api.types.is_integer_dtype(dtype):
+            return "bigint"
+        if pd.api.types.is_float_dtype(dtype):
+            return "float"
+        return None
+
+    @staticmethod
+    def column_types(df, field_types=None):
         """
-        self.reopen_connection()
-        if if_exists == "append":
-            query = f"DELETE FROM {table_name}"
-            cursor = self.cnx.cursor()
-            cursor.execute(query)
+        Map DataFrame columns to SQL column types for fast_to_sql.
 
+        :param df: DataFrame, data about to be inserted.
+        :param field_types: dict, Bloomberg datatype per column, default is None.
+        :return: dict, SQL type per column, except the timestamp columns.
+        """
+        field_types = field_types or {}
         custom = {}
 
         for column in df.columns.tolist():
             if "timestamp" in column.lower():
                 continue
 
-            elif df.dtypes[column] != np.int64 and df.dtypes[column] != np.float64:
+            datatype = str(field_types.get(column)).lower()
+            numeric = MSSQLDatabase.numeric_type(df.dtypes[column])
+            if numeric and datatype in NUMERIC_FIELD_TYPES:
+                custom[column] = NUMERIC_FIELD_TYPES[datatype]
+
+            elif datatype in TEXT_FIELD_TYPES:
+                custom[column] = TEXT_FIELD_TYPES[datatype]
+
+            elif not numeric:
                 custom[column] = "varchar(100)"
 
-        fast_to_sql.fast_to_sql(
-            df=df, name=table_name, conn=self.cnx, if_exists=if_exists, custom=custom
-        )
-        logging.info(f"Inserted {len(df)} rows into {table_name} table")
-        self.cnx.commit()
-        self.cnx.close()
-        return
+            else:
+                custom[column] = numeric
 
-    def reopen_connection(self):
-        """
-        Reopen the connection to the database if it is closed.
-        """
-        if not self.cnx or not self.cnx.connected:
-            self.cnx = pyodbc.connect(self.CNX_STRING)
+        return custom
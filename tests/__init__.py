@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the state files written by the code under test out of the checkout.
+os.environ.setdefault("STATE_DIR", tempfile.mkdtemp(prefix="extbbg_state_"))
@@ -0,0 +1,190 @@
+"""
+Local stand-in for the BEAP endpoints used by AsyncClient.
+
+It serves one scheduled catalog, accepts universes, field lists and
+requests, and delivers the reply of every request after delay seconds:
+the reply shows up in the catalog's responses and, unless sse is False,
+is announced on the notification stream. ThreadedStandin serves it from a
+background event loop for the blocking Client.
+"""
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+from aiohttp import web
+
+CATALOG = "123456"
+CREDENTIAL = {
+    "client_id": "standin",
+    "client_secret": "00" * 32,
+    "expiration_date": int((time.time() + 365 * 86400) * 1000),
+}
+ROWS = [
+    {"IDENTIFIER": "AAPL US Equity", "RC": 0, "PX_LAST": 190.5},
+    {"IDENTIFIER": "MSFT US Equity", "RC": 0, "PX_LAST": 410.25},
+]
+
+
+class StandinBEAP:
+    def __init__(self, rows, sse=True, delay=0.05, heartbeat=0.1, stall=False):
+        """
+        Args:
+            rows (list): Reply rows of every request.
+            sse (bool): Announce deliveries on the notification stream.
+            delay (float): Seconds between a request and its delivery.
+            heartbeat (float): Seconds between heartbeats on an idle stream.
+            stall (bool): Never send the body of a reply download.
+        """
+        self.rows = rows
+        self.sse = sse
+        self.delay = delay
+        self.heartbeat = heartbeat
+        self.stall = stall
+        self.requests = []
+        self.universes = []
+        self.replies = {}
+        self.streams = []
+        self.sse_connections = 0
+        self.polls = 0
+
+        self.app = web.Application()
+        self.app.router.add_get("/eap/catalogs/", self.catalogs)
+        self.app.router.add_post("/eap/catalogs/{catalog}/{kind}/", self.create)
+        self.app.router.add_get("/eap/notifications/sse", self.notifications)
+        self.app.router.add_get(
+            "/eap/catalogs/{catalog}/content/responses/", self.responses
+        )
+        self.app.router.add_get(
+            "/eap/catalogs/{catalog}/content/responses/{key}", self.reply
+        )
+
+    async def catalogs(self, request):
+        return web.json_response(
+            {
+                "contains": [
+                    {"identifier": "bbg", "subscriptionType": "data"},
+                    {"identifier": CATALOG, "subscriptionType": "scheduled"},
+                ]
+            }
+        )
+
+    async def create(self, request):
+        body = await request.read()
+        if request.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+        kind = request.match_info["kind"]
+        if kind == "universes":
+            self.universes.append(payload["identifier"])
+        elif kind == "requests":
+            self.requests.append(payload)
+            asyncio.get_running_loop().call_later(
+                self.delay,
+                self._deliver,
+                f"{request.scheme}://{request.host}",
+                payload["identifier"],
+            )
+
+        location = f"/eap/catalogs/{CATALOG}/{kind}/{payload['identifier']}/"
+        return web.Response(status=201, headers={"Location": location})
+
+    def _deliver(self, origin, request_id):
+        key = f"{request_id}.json"
+        self.replies[key] = gzip.compress(json.dumps(self.rows).encode("utf-8"))
+        if not self.sse:
+            return
+
+        event = {
+            "generated": {
+                "@id": f"{origin}/eap/catalogs/{CATALOG}/content/responses/{key}",
+                "identifier": key,
+                "snapshot": {"dataset": {"catalog": {"identifier": CATALOG}}},
+            }
+        }
+        for stream in self.streams:
+            stream.put_nowait(f"data: {json.dumps(event)}\n\n")
+
+    async def notifications(self, request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        self.sse_connections += 1
+        stream = asyncio.Queue()
+        self.streams.append(stream)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(stream.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    message = ":\n\n"
+                # Fails once the client is gone, which ends the stream.
+                await response.write(message.encode("utf-8"))
+        finally:
+            self.streams.remove(stream)
+
+    async def responses(self, request):
+        self.polls += 1
+        key = f"{request.query.get('requestIdentifier')}.json"
+        contains = [{"key": key}] if key in self.replies else []
+        return web.json_response({"contains": contains})
+
+    async def reply(self, request):
+        key = request.match_info["key"]
+        if key not in self.replies:
+            raise web.HTTPNotFound()
+
+        if self.stall:
+            response = web.StreamResponse(headers={"Content-Encoding": "gzip"})
+            await response.prepare(request)
+            await asyncio.sleep(3600)
+
+        return web.Response(
+            body=self.replies[key],
+            headers={
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+                "Content-Disposition": f"attachment; filename={key}",
+            },
+        )
+
+
+class ThreadedStandin:
+    """
+    Run a StandinBEAP on an event loop in a background thread:
+
+        with ThreadedStandin(StandinBEAP(rows)) as url:
+            ...
+    """
+
+    def __init__(self, standin):
+        self.standin = standin
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.runner = web.AppRunner(standin.app)
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(10)
+
+    def __enter__(self):
+        self.thread.start()
+        self._call(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0, shutdown_timeout=1)
+        self._call(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    @staticmethod
+    async def _cancel_tasks():
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __exit__(self, *exc):
+        self._call(self.runner.cleanup())
+        self._call(self._cancel_tasks())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+        self.loop.close()
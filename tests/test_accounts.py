@@ -0,0 +1,79 @@
+import unittest
+from collections import Counter
+
+from app import accounts
+
+
+def account(name, weight=1):
+    return accounts.Account({"client_id": name}, weight=weight)
+
+
+class SplitTest(unittest.TestCase):
+    def test_sizes_follow_weights(self):
+        items = list(range(10))
+
+        chunks = accounts.split(items, [3, 1, 1])
+
+        self.assertEqual([len(chunk) for chunk in chunks], [6, 2, 2])
+        self.assertEqual(sum(chunks, []), items)
+
+    def test_remainder_goes_to_largest_fractions(self):
+        self.assertEqual(
+            [len(chunk) for chunk in accounts.split(list(range(10)), [1, 1, 1])],
+            [4, 3, 3],
+        )
+        self.assertEqual(
+            [len(chunk) for chunk in accounts.split(list(range(5)), [1, 2])],
+            [2, 3],
+        )
+
+    def test_fewer_items_than_weights(self):
+        self.assertEqual(accounts.split(["A"], [1, 1]), [["A"], []])
+
+
+class WeightedRotationTest(unittest.TestCase):
+    def test_picks_in_proportion_to_weight(self):
+        heavy, light = account("heavy", 3), account("light")
+        rotation = accounts.WeightedRotation([heavy, light])
+
+        picks = [rotation.select()[0].client_id for _ in range(8)]
+
+        self.assertEqual(Counter(picks), {"heavy": 6, "light": 2})
+        self.assertNotIn(["heavy"] * 4, [picks[i : i + 4] for i in range(5)])
+
+    def test_selects_distinct_accounts(self):
+        rotation = accounts.WeightedRotation([account("a"), account("b", 2)])
+
+        for _ in range(5):
+            picked = rotation.select(3)
+            self.assertEqual(sorted(a.client_id for a in picked), ["a", "b"])
+
+    def test_spreads_single_selections(self):
+        rotation = accounts.WeightedRotation([account(n) for n in "abc"])
+
+        picks = [rotation.select()[0].client_id for _ in range(6)]
+
+        self.assertEqual(Counter(picks), {"a": 2, "b": 2, "c": 2})
+
+
+class AccountTest(unittest.TestCase):
+    def test_parse_keeps_catalog_and_weight(self):
+        parsed = accounts.parse(
+            [{"client_id": "a"}, {"client_id": "b", "catalog": "42", "weight": 2}]
+        )
+
+        self.assertEqual([a.client_id for a in parsed], ["a", "b"])
+        self.assertEqual(parsed[1].credential, {"client_id": "b"})
+        self.assertEqual(
+            parsed[1].to_dict(), {"client_id": "b", "weight": 2, "catalog": "42"}
+        )
+
+    def test_rejects_empty_and_non_positive_weights(self):
+        with self.assertRaises(ValueError):
+            accounts.parse([])
+        with self.assertRaises(ValueError):
+            account("a", 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+from app.aio import AsyncClient
+from app.metadata import MetadataCache
+from tests.standin import CREDENTIAL, ROWS, StandinBEAP
+
+CONFIG = {
+    "app_name": "standin",
+    "description": "stand-in test",
+    "field_url": "https://api.bloomberg.com/eap/catalogs/bbg/fields/",
+}
+
+
+class AsyncClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+
+    async def asyncTearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    async def start(self, standin, config=CONFIG):
+        server = TestServer(standin.app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        client = AsyncClient(CREDENTIAL, config, host=str(server.make_url("/")))
+        client.metadata = MetadataCache(os.path.join(self.directory.name, "meta.json"))
+        await client.open()
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not met in time")
+            await asyncio.sleep(0.01)
+
+    async def test_submit_delivered_by_sse(self):
+        standin = StandinBEAP(ROWS)
+        client = await self.start(standin)
+        await self.wait_for(lambda: standin.sse_connections == 1)
+
+        frames = await asyncio.gather(
+            client.submit(["AAPL US Equity", "MSFT US Equity"]),
+            client.submit(["AAPL US Equity"]),
+        )
+
+        self.assertEqual(len(standin.requests), 2)
+        identifiers = [row["IDENTIFIER"] for row in ROWS]
+        for frame in frames:
+            self.assertEqual(frame["IDENTIFIER"].tolist(), identifiers)
+        self.assertEqual(standin.polls, 0)
+        self.assertEqual(standin.sse_connections, 1)
+        self.assertEqual(client.catalog_id, "123456")
+
+    async def test_submit_falls_back_to_polling(self):
+        standin = StandinBEAP(ROWS, sse=False)
+        client = await self.start(standin)
+        client.POLL_MIN_SEC = 0.05
+        client.POLL_MAX_SEC = 0.1
+
+        frames = await asyncio.gather(
+            client.submit(["AAPL US Equity"]), client.submit(["MSFT US Equity"])
+        )
+
+        for frame in frames:
+            self.assertEqual(frame["PX_LAST"].tolist(), [190.5, 410.25])
+        self.assertGreaterEqual(standin.polls, 2)
+        self.assertEqual(client.polls, {})
+        await self.wait_for(lambda: client.poll_task.done())
+
+    async def test_poll_timeout_keeps_polling(self):
+        standin = StandinBEAP(ROWS, sse=False)
+        client = await self.start(standin)
+        client.POLL_MIN_SEC = 0.05
+        client.POLL_MAX_SEC = 0.1
+        send = client._send
+        timeouts = []
+
+        async def timing_out_send(method, url, **kwargs):
+            if "content/responses/" in url and not timeouts:
+                timeouts.append(url)
+                raise asyncio.TimeoutError()
+            return await send(method, url, **kwargs)
+
+        client._send = timing_out_send
+        frame = await client.submit(["AAPL US Equity"])
+
+        self.assertEqual(len(timeouts), 1)
+        self.assertEqual(frame["PX_LAST"].tolist(), [190.5, 410.25])
+
+    async def test_stalled_download_times_out(self):
+        standin = StandinBEAP(ROWS, sse=False, stall=True)
+        client = await self.start(standin)
+        client.DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(sock_read=0.1)
+        standin._deliver("", "rstalled")
+        url = f"{client.account_url}content/responses/rstalled.json"
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.download(url, "rstalled.json")
+
+    async def test_listen_times_out(self):
+        standin = StandinBEAP(ROWS, sse=False)
+        client = await self.start(standin, dict(CONFIG, poll_responses=False))
+
+        self.assertIsNone(await client.listen("rnever", timeout=0.1))
+        self.assertEqual(client.waiters, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
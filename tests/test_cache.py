@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from app.intra.cache import LastValueCache
+
+
+class LastValueCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "lvc.json")
+
+    def test_new_and_changed_rows(self):
+        cache = LastValueCache(self.path).load()
+        records = [{"ID": "a", "PX": 1.0}, {"ID": "b", "PX": 2.0}]
+        changed, latest = cache.changes(records, "ID", ["PX"])
+        self.assertEqual(changed, [True, True])
+        cache.commit(latest)
+
+        records = [{"ID": "a", "PX": 1.0}, {"ID": "b", "PX": 2.5}]
+        changed, _ = cache.changes(records, "ID", ["PX"])
+        self.assertEqual(changed, [False, True])
+
+    def test_changes_are_not_applied_before_commit(self):
+        cache = LastValueCache(self.path).load()
+        cache.changes([{"ID": "a", "PX": 1.0}], "ID", ["PX"])
+        changed, _ = cache.changes([{"ID": "a", "PX": 1.0}], "ID", ["PX"])
+        self.assertEqual(changed, [True])
+
+    def test_nan_equals_missing(self):
+        cache = LastValueCache(self.path).load()
+        _, latest = cache.changes([{"ID": 1, "PX": float("nan")}], "ID", ["PX"])
+        cache.commit(latest)
+        changed, _ = cache.changes([{"ID": 1}], "ID", ["PX"])
+        self.assertEqual(changed, [False])
+
+    def test_persist_and_load(self):
+        cache = LastValueCache(self.path).load()
+        _, latest = cache.changes([{"ID": "a", "PX": 1.0}], "ID", ["PX"])
+        cache.commit(latest)
+        cache.persist()
+
+        reloaded = LastValueCache(self.path).load()
+        changed, _ = reloaded.changes([{"ID": "a", "PX": 1.0}], "ID", ["PX"])
+        self.assertEqual(changed, [False])
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_unreadable_file_starts_empty(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{truncated")
+        self.assertEqual(LastValueCache(self.path).load().values, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
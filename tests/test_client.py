@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from app import client
+from app.backfill.client import Client as BackfillClient
+from app.eod.client import Client as EodClient
+from app.intra.client import Client as IntraClient
+from tests.standin import CREDENTIAL, ROWS, StandinBEAP, ThreadedStandin
+
+CONFIG = {
+    "app_name": "standin",
+    "description": "stand-in test",
+    "output_table": "dbo.standin",
+    "field_url": "https://api.bloomberg.com/eap/catalogs/bbg/fields/",
+    "delete_columns": [],
+    "is_identifier_isin": False,
+    "poll_responses": False,
+}
+
+
+class ClientTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        self.addCleanup(os.chdir, self.cwd)
+
+    def serve(self, standin):
+        self.server = ThreadedStandin(standin)
+        url = self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        patcher = mock.patch.object(client.Client, "HOST", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return url
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not met in time")
+            time.sleep(0.01)
+
+    def test_fetch_delivered_by_sse_and_close(self):
+        standin = StandinBEAP(ROWS)
+        self.serve(standin)
+        sync = EodClient(CREDENTIAL, CONFIG)
+        self.addCleanup(sync.close)
+
+        frame = sync.fetch(["AAPL US Equity", "MSFT US Equity"])
+
+        self.assertTrue(sync.status)
+        self.assertEqual(frame["PX_LAST"].tolist(), [190.5, 410.25])
+        self.assertEqual(len(standin.requests), 1)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+        sync.close()
+        sync.sse_thread.join(5)
+        self.assertFalse(sync.sse_thread.is_alive())
+        self.wait_for(lambda: not standin.streams)
+
+    def test_notifications_dropped_without_listener(self):
+        standin = StandinBEAP(ROWS)
+        url = self.serve(standin)
+        sync = EodClient(CREDENTIAL, CONFIG)
+        self.addCleanup(sync.close)
+        sync.fetch(["AAPL US Equity"])
+
+        self.server.loop.call_soon_threadsafe(standin._deliver, url, "rother")
+        self.wait_for(lambda: "rother.json" in standin.replies)
+        time.sleep(0.2)
+
+        self.assertTrue(sync.notifications.empty())
+
+    def test_stalled_stream_reconnects(self):
+        standin = StandinBEAP(ROWS, heartbeat=60)
+        self.serve(standin)
+        config = dict(CONFIG, http_pools={"stream": {"read_timeout": 0.2}})
+        sync = EodClient(CREDENTIAL, config)
+        self.addCleanup(sync.close)
+        # The pools are mounted for https only, reconnect through the stream
+        # pool and its read timeout.
+        sync.sessions["stream"].mount("http://", sync.adapters["stream"])
+        sync.sse_client.bounce_connection(sleep_after_disconnect=0)
+        sync.sse_client.retry_interval = 0.05
+
+        sync._start_sse_pump()
+
+        self.wait_for(lambda: standin.sse_connections >= 3)
+
+    def test_backfill_closes_worker_clients(self):
+        rows = [dict(row, DATE="2024-01-02") for row in ROWS]
+        standin = StandinBEAP(rows)
+        self.serve(standin)
+        path = os.path.join(self.directory.name, "backfill.db")
+        config = dict(
+            CONFIG,
+            sinks=[{"type": "sqlite", "path": path}],
+            backfill={
+                "start_date": "2024-01-01",
+                "end_date": "2024-01-04",
+                "window_days": 2,
+                "max_workers": 2,
+                "min_submit_interval_sec": 0,
+            },
+        )
+        backfill = BackfillClient(CREDENTIAL, config)
+        self.addCleanup(backfill.close)
+        self.assertTrue(backfill.run(["AAPL US Equity", "MSFT US Equity"]))
+
+        self.assertEqual(len(standin.requests), 2)
+        self.assertEqual(backfill.worker_clients, [])
+        # Only the SSE connection of the backfill client itself is left.
+        self.wait_for(lambda: len(standin.streams) == 1)
+        self.assertGreater(standin.sse_connections, 1)
+        with sqlite3.connect(path) as connection:
+            count = connection.execute("SELECT COUNT(*) FROM dbo_standin").fetchone()
+        self.assertEqual(count, (2,))
+
+    def run_intra(self, credential, **config):
+        rows = [
+            dict(
+                row,
+                LAST_UPDATE="16:30:05",
+                LAST_UPDATE_DT="2024-01-02",
+                LAST_TRADE_DATE="2024-01-02",
+                LAST_TRADE_TIME="16:30:00",
+            )
+            for row in ROWS
+        ]
+        standin = StandinBEAP(rows)
+        self.serve(standin)
+        path = os.path.join(self.directory.name, "intra.db")
+        config = dict(
+            CONFIG,
+            output_table=f"dbo.intra_{self._testMethodName}",
+            sinks=[{"type": "sqlite", "path": path, "table": "intra"}],
+            intraday={"interval_sec": 0, "cycles": 2},
+            **config,
+        )
+        intra = IntraClient(credential, config)
+        self.addCleanup(intra.close)
+        self.assertTrue(intra.run(["AAPL US Equity", "MSFT US Equity"]))
+        with sqlite3.connect(path) as connection:
+            count = connection.execute("SELECT COUNT(*) FROM intra").fetchone()
+        return standin, count[0]
+
+    def test_intra_reuses_universe_across_cycles(self):
+        standin, count = self.run_intra(CREDENTIAL)
+
+        self.assertEqual(len(standin.universes), 1)
+        self.assertEqual(len(standin.requests), 2)
+        self.assertEqual(count, 2)
+
+    def test_intra_spreads_cycles_over_accounts(self):
+        credential = [CREDENTIAL, dict(CREDENTIAL, client_id="standin2")]
+        standin, _ = self.run_intra(credential, distribution={"min_shard_size": 1})
+
+        self.assertEqual(len(standin.universes), 2)
+        self.assertEqual(len(standin.requests), 4)
+        self.assertEqual(standin.sse_connections, 2)
+
+
+class FailedIdentifiersTest(unittest.TestCase):
+    def failed(self, rows, return_codes=None, delete_columns=()):
+        sync = client.Client.__new__(client.Client)
+        sync.config = {"delete_columns": list(delete_columns)}
+        if return_codes is not None:
+            sync.config["retry_failed"] = {"return_codes": return_codes}
+        sync.dataframe = pd.DataFrame(rows)
+        return sync.failed_identifiers()
+
+    def test_blank_rows_without_error_are_retried(self):
+        rows = [
+            {"IDENTIFIER": "A", "RC": 0, "PX_LAST": 1.0, "NAME": "a"},
+            {"IDENTIFIER": "B", "RC": 0, "PX_LAST": None, "NAME": " "},
+            {"IDENTIFIER": "C", "RC": 0, "PX_LAST": None, "NAME": "c"},
+        ]
+
+        self.assertEqual(self.failed(rows), ["B"])
+
+    def test_only_transient_return_codes_are_retried(self):
+        rows = [
+            {"IDENTIFIER": "A", "RC": 9, "PX_LAST": None},
+            {"IDENTIFIER": "B", "RC": "10", "PX_LAST": None},
+            {"IDENTIFIER": "C", "RC": 10, "PX_LAST": 2.0},
+        ]
+
+        self.assertEqual(self.failed(rows), [])
+        self.assertEqual(self.failed(rows, return_codes=[10]), ["B", "C"])
+
+    def test_bookkeeping_columns_are_not_fields(self):
+        rows = [
+            {"IDENTIFIER": "A", "PX_LAST": None, "DL_REQUEST_ID": "r1"},
+            {"IDENTIFIER": "A", "PX_LAST": None, "DL_REQUEST_ID": "r1"},
+            {"IDENTIFIER": None, "PX_LAST": None, "DL_REQUEST_ID": "r1"},
+        ]
+
+        self.assertEqual(self.failed(rows), [])
+        self.assertEqual(self.failed(rows, delete_columns=["DL_REQUEST_ID"]), ["A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+from db.lease import SQLiteShardStore
+
+RUN = "run-1"
+
+
+class SQLiteShardStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "shards.db")
+        self.store = SQLiteShardStore(self.path)
+        self.store.setup()
+        self.store.create_run(RUN, [["A", "B"], ["C"]])
+
+    def test_claims_each_shard_once(self):
+        self.assertEqual(self.store.claim(RUN, "w1", 60), (0, ["A", "B"]))
+        self.assertEqual(self.store.claim(RUN, "w2", 60), (1, ["C"]))
+        self.assertIsNone(self.store.claim(RUN, "w3", 60))
+
+    def test_create_run_keeps_progress(self):
+        shard_id, _ = self.store.claim(RUN, "w1", 60)
+        self.assertTrue(self.store.complete(RUN, shard_id, "w1"))
+
+        self.store.create_run(RUN, [["A", "B"], ["C"]])
+
+        self.assertEqual(self.store.remaining(RUN), 1)
+        self.assertEqual(self.store.claim(RUN, "w1", 60), (1, ["C"]))
+
+    def test_expired_lease_is_claimed_again(self):
+        self.store.claim(RUN, "w1", -1)
+
+        self.assertEqual(self.store.claim(RUN, "w2", 60), (0, ["A", "B"]))
+        self.assertFalse(self.store.renew(RUN, 0, "w1", 60))
+        self.assertTrue(self.store.renew(RUN, 0, "w2", 60))
+        self.assertEqual(self.store.claim(RUN, "w3", 60), (1, ["C"]))
+
+    def test_release_makes_shard_pending(self):
+        self.store.claim(RUN, "w1", 60)
+
+        self.assertFalse(self.store.release(RUN, 0, "w2"))
+        self.assertTrue(self.store.release(RUN, 0, "w1"))
+        self.assertFalse(self.store.renew(RUN, 0, "w1", 60))
+        self.assertEqual(self.store.claim(RUN, "w2", 60), (0, ["A", "B"]))
+
+    def test_write_stage_requires_the_lease(self):
+        df = pd.DataFrame({"IDENTIFIER": ["A", "B"], "PX LAST": [1.0, 2.0]})
+        self.store.claim(RUN, "w1", -1)
+        self.assertEqual(self.store.claim(RUN, "w2", 60)[0], 0)
+
+        self.assertFalse(self.store.write_stage(df, "stage", RUN, 0, "w1", 60))
+        self.assertTrue(self.store.write_stage(df, "stage", RUN, 0, "w2", 60))
+        self.assertTrue(self.store.write_stage(df, "stage", RUN, 0, "w2", 60))
+        self.assertFalse(self.store.complete(RUN, 0, "w1"))
+        self.assertTrue(self.store.complete(RUN, 0, "w2"))
+
+        with sqlite3.connect(self.path) as cnx:
+            cnx.execute('CREATE TABLE output (IDENTIFIER TEXT, "PX LAST" REAL)')
+            cnx.execute("INSERT INTO output VALUES ('OLD', 0)")
+
+        self.assertEqual(self.store.publish("stage", "output", RUN), 2)
+        with sqlite3.connect(self.path) as cnx:
+            rows = cnx.execute('SELECT IDENTIFIER, "PX LAST" FROM output').fetchall()
+            staged = cnx.execute("SELECT COUNT(*) FROM stage").fetchone()
+        self.assertEqual(sorted(rows), [("A", 1.0), ("B", 2.0)])
+        self.assertEqual(staged, (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import contextlib
+import datetime
+import os
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+for name in ("SERVER", "DATABASE", "USERNAME", "PASSWORD"):
+    os.environ.setdefault(f"MSSQL_{name}", "test")
+
+from db.mssql import MSSQLDatabase  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, objects):
+        self.objects = objects
+        self.statements = []
+        self.result = None
+
+    def execute(self, query, params=()):
+        self.statements.append(query)
+        if query.startswith("SELECT OBJECT_ID"):
+            self.result = 1 if params[0] in self.objects else None
+
+    def fetchone(self):
+        return (self.result,)
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+class MSSQLDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.database = MSSQLDatabase()
+
+    def connect(self, objects):
+        cursor = FakeCursor(objects)
+        cnx = FakeConnection(cursor)
+
+        @contextlib.contextmanager
+        def connection():
+            yield cnx
+
+        self.database.connection = connection
+        return cursor, cnx
+
+    def test_digest_ignores_timestamp_columns(self):
+        df = pd.DataFrame({"IDENTIFIER": ["A", "B"], "PX_LAST": [1.0, 2.0]})
+        first = df.assign(timestamp_created_utc=datetime.datetime(2024, 1, 2))
+        rerun = df.assign(timestamp_created_utc=datetime.datetime(2024, 1, 3))
+        changed = first.assign(PX_LAST=[1.0, 2.5])
+
+        self.assertEqual(self.database.digest(first), self.database.digest(rerun))
+        self.assertNotEqual(self.database.digest(first), self.database.digest(changed))
+
+    def test_column_types(self):
+        df = pd.DataFrame(
+            {
+                "IDENTIFIER": ["A", "B"],
+                "PX_LAST": [1.5, 2.5],
+                "VOLUME": [10, 20],
+                "IS_ACTIVE": [True, False],
+                "DESCRIPTION": ["x", "y"],
+                "timestamp_created_utc": [datetime.datetime(2024, 1, 2)] * 2,
+            }
+        )
+        field_types = {"PX_LAST": "Price", "DESCRIPTION": "Long Character"}
+        expected = {
+            "IDENTIFIER": "varchar(100)",
+            "PX_LAST": "float",
+            "VOLUME": "bigint",
+            "IS_ACTIVE": "bit",
+            "DESCRIPTION": "varchar(max)",
+        }
+
+        self.assertEqual(self.database.column_types(df, field_types), expected)
+        self.assertEqual(
+            self.database.column_types(df.convert_dtypes(), field_types), expected
+        )
+
+    def test_nullable_integers_are_numeric(self):
+        df = pd.DataFrame({"VOLUME": pd.array([10, None], dtype="Int64")})
+
+        self.assertEqual(
+            self.database.column_types(df, {"VOLUME": "Integer"}),
+            {"VOLUME": "bigint"},
+        )
+
+    def test_quote(self):
+        self.assertEqual(
+            self.database.quote("dbo.eod_stage_eod-20240102"),
+            "[dbo].[eod_stage_eod-20240102]",
+        )
+
+    def test_publish_moves_staged_rows(self):
+        cursor, cnx = self.connect({"[dbo].[eod_stage_r1]", "dbo.eod"})
+        df = pd.DataFrame({"IDENTIFIER": ["A"], "PX_LAST": [1.0]})
+
+        self.database._publish("dbo.eod_stage_r1", "dbo.eod", df)
+
+        self.assertEqual(
+            cursor.statements[2:],
+            [
+                "DELETE FROM dbo.eod",
+                "INSERT INTO dbo.eod ([IDENTIFIER],[PX_LAST]) "
+                "SELECT [IDENTIFIER],[PX_LAST] FROM [dbo].[eod_stage_r1]",
+                "DROP TABLE [dbo].[eod_stage_r1]",
+            ],
+        )
+        self.assertEqual(cnx.commits, 1)
+
+    def test_publish_skips_dropped_staging_table(self):
+        cursor, cnx = self.connect({"dbo.eod"})
+        df = pd.DataFrame({"IDENTIFIER": ["A"], "PX_LAST": [1.0]})
+
+        with mock.patch.object(self.database, "delete_keys") as delete_keys:
+            self.database._publish("dbo.eod_stage_r1", "dbo.eod", df, "IDENTIFIER")
+
+        self.assertEqual(len(cursor.statements), 1)
+        delete_keys.assert_not_called()
+        self.assertEqual(cnx.commits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import datetime
+import unittest
+
+from app.schedule import CronSchedule
+
+
+def at(*args):
+    return datetime.datetime(*args)
+
+
+class CronScheduleTest(unittest.TestCase):
+    def test_next_minute_and_hour(self):
+        schedule = CronSchedule("*/15 9-17 * * *")
+        self.assertEqual(
+            schedule.next_after(at(2024, 1, 2, 9, 0)), at(2024, 1, 2, 9, 15)
+        )
+        self.assertEqual(schedule.next_after(at(2024, 1, 2, 17, 50)), at(2024, 1, 3, 9))
+
+    def test_next_is_strictly_after(self):
+        schedule = CronSchedule("30 22 * * *")
+        self.assertEqual(
+            schedule.next_after(at(2024, 1, 2, 22, 30, 10)), at(2024, 1, 3, 22, 30)
+        )
+
+    def test_start_with_step_runs_to_field_maximum(self):
+        schedule = CronSchedule("5/20 * * * *")
+        self.assertEqual(schedule.minutes, {5, 25, 45})
+
+    def test_weekday_seven_is_sunday(self):
+        schedule = CronSchedule("0 6 * * 7")
+        # 2024-01-06 is a Saturday.
+        self.assertEqual(schedule.next_after(at(2024, 1, 6, 12)), at(2024, 1, 7, 6))
+
+    def test_restricted_day_fields_match_either(self):
+        # The 15th, or any Monday.
+        schedule = CronSchedule("0 0 15 * 1")
+        self.assertEqual(schedule.next_after(at(2024, 1, 2)), at(2024, 1, 8))
+        self.assertEqual(schedule.next_after(at(2024, 1, 12)), at(2024, 1, 15))
+
+    def test_stepped_star_day_matches_both(self):
+        # Odd days that are Mondays, not odd days or Mondays.
+        schedule = CronSchedule("0 0 */2 * 1")
+        self.assertEqual(schedule.next_after(at(2024, 1, 2)), at(2024, 1, 15))
+
+    def test_month_and_day(self):
+        schedule = CronSchedule("0 0 29 2 *")
+        self.assertEqual(schedule.next_after(at(2024, 3, 1)), at(2028, 2, 29))
+
+    def test_invalid_expressions(self):
+        for expression in ("* * * *", "60 * * * *", "5/0 * * * *", "* * 0 * *"):
+            with self.assertRaises(ValueError, msg=expression):
+                CronSchedule(expression)
+
+    def test_never_matches(self):
+        with self.assertRaises(ValueError):
+            CronSchedule("0 0 31 2 *").next_after(at(2024, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
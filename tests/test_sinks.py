@@ -0,0 +1,93 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+from app.sinks import CsvSink, SQLiteSink
+
+KEYS = ["DATE", "IDENTIFIER"]
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["DATE", "IDENTIFIER", "PX_LAST"])
+
+
+FIRST = frame(
+    [
+        (datetime.date(2024, 1, 2), "A", 1.0),
+        (datetime.date(2024, 1, 2), "B", 2.0),
+        (datetime.date(2024, 1, 3), "A", 3.0),
+    ]
+)
+SECOND = frame(
+    [
+        (datetime.date(2024, 1, 2), "A", 10.0),
+        (datetime.date(2024, 1, 4), "A", 40.0),
+    ]
+)
+
+
+class SinkTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_sqlite_replaces_keys_in_reply(self):
+        path = os.path.join(self.directory, "out.db")
+        SQLiteSink(path, "out", KEYS).write(FIRST)
+        SQLiteSink(path, "out", KEYS).write(SECOND)
+
+        with sqlite3.connect(path) as cnx:
+            rows = cnx.execute("SELECT * FROM out ORDER BY 1, 2").fetchall()
+            tables = cnx.execute("SELECT name FROM sqlite_master").fetchall()
+        self.assertEqual(
+            rows,
+            [
+                ("2024-01-02", "A", 10.0),
+                ("2024-01-02", "B", 2.0),
+                ("2024-01-03", "A", 3.0),
+                ("2024-01-04", "A", 40.0),
+            ],
+        )
+        self.assertEqual(tables, [("out",)])
+
+    def test_sqlite_replaces_all_rows_without_keys(self):
+        path = os.path.join(self.directory, "out.db")
+        SQLiteSink(path, "out").write(FIRST)
+        SQLiteSink(path, "out").write(SECOND)
+
+        with sqlite3.connect(path) as cnx:
+            count = cnx.execute("SELECT COUNT(*) FROM out").fetchone()
+        self.assertEqual(count, (2,))
+
+    def test_csv_replaces_keys_in_reply(self):
+        path = os.path.join(self.directory, "out.csv.gz")
+        CsvSink(path, replace_on=KEYS).write(FIRST)
+        CsvSink(path, replace_on=KEYS).write(SECOND)
+
+        written = pd.read_csv(path).sort_values(KEYS)
+        self.assertEqual(
+            written.values.tolist(),
+            [
+                ["2024-01-02", "A", 10.0],
+                ["2024-01-02", "B", 2.0],
+                ["2024-01-03", "A", 3.0],
+                ["2024-01-04", "A", 40.0],
+            ],
+        )
+        self.assertFalse(os.path.exists(f"{path}.tmp"))
+
+    def test_csv_replaces_file_without_keys(self):
+        path = os.path.join(self.directory, "out.csv")
+        CsvSink(path, compression=None).write(FIRST)
+        CsvSink(path, compression=None).write(SECOND)
+
+        self.assertEqual(len(pd.read_csv(path)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
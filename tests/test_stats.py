@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from app.stats import TurnaroundStore
+
+KEY = "eod:dbo.eod"
+
+
+class TurnaroundStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = TurnaroundStore(os.path.join(directory.name, "turnaround.db"))
+        self.requested_at = 0
+
+    def record(self, latencies, app=KEY, universe_size=1000, delivered=True):
+        for latency in latencies:
+            self.requested_at += 1
+            self.store.record(app, universe_size, self.requested_at, latency, delivered)
+
+    def test_default_without_enough_history(self):
+        self.record([600] * 4)
+
+        self.assertEqual(self.store.deadline(KEY, 1000, 2700), (2700, None))
+
+    def test_p99_plus_margin(self):
+        self.record([600, 700, 800, 900, 1000])
+
+        self.assertEqual(self.store.deadline(KEY, 1000, 2700), (1250.0, 800))
+
+    def test_minimum(self):
+        self.record([10] * 5)
+
+        self.assertEqual(self.store.deadline(KEY, 1000, 2700), (300, 10))
+
+    def test_at_least_default_after_a_timeout(self):
+        self.record([600] * 5)
+        self.record([900], delivered=False)
+
+        timeout, expected = self.store.deadline(KEY, 1000, 2700)
+
+        self.assertEqual(timeout, 2700)
+        self.assertEqual(expected, 600)
+
+    def test_similar_universe_sizes_only(self):
+        self.record([600] * 5)
+        self.record([3000] * 5, universe_size=100000)
+
+        self.assertEqual(self.store.deadline(KEY, 1500, 2700), (750.0, 600))
+        self.assertEqual(self.store.deadline(KEY, 400, 2700), (2700, None))
+
+    def test_summary_by_app_name(self):
+        self.record([600, 700])
+        self.record([800], app="eod:dbo.eod_other")
+        self.record([900], app="eod:dbo.eod_other", delivered=False)
+        self.record([5000], app="eod_backfill:dbo.eod")
+
+        summary = self.store.summary("eod")
+
+        self.assertEqual(list(summary), ["eod"])
+        self.assertEqual(summary["eod"]["samples"], 3)
+        self.assertEqual(summary["eod"]["not_delivered"], 1)
+        self.assertEqual(summary["eod"]["p99"], 800)
+        self.assertEqual(
+            sorted(self.store.summary()),
+            ["eod:dbo.eod", "eod:dbo.eod_other", "eod_backfill:dbo.eod"],
+        )
+        self.assertEqual(self.store.summary(KEY)[KEY]["samples"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import itertools
+import time
+import unittest
+from collections import deque
+
+from beap.beap_auth import TokenPool
+
+KEY = ("/eap/catalogs/", "GET", "api.bloomberg.com")
+
+
+class FakeCredentials:
+    def __init__(self):
+        self.counter = itertools.count()
+        self.signed = 0
+
+    def generate_token(self, path, method, host):
+        self.signed += 1
+        return f"token-{next(self.counter)}"
+
+
+class TokenPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.credentials = FakeCredentials()
+        self.pool = TokenPool(self.credentials, size=3, min_requests=2)
+        # Refill by hand so the tests don't race the background thread.
+        self.pool.close()
+        self.pool.thread.join(5)
+
+    def test_one_off_keys_are_not_presigned(self):
+        self.pool.get(*KEY)
+        self.pool._refill()
+
+        self.assertEqual(self.credentials.signed, 1)
+        self.assertEqual(len(self.pool.pools[KEY]), 0)
+        self.assertEqual((self.pool.hits, self.pool.misses), (0, 1))
+
+    def test_repeated_keys_are_presigned(self):
+        self.pool.get(*KEY)
+        self.pool.get(*KEY)
+        self.pool._refill()
+
+        self.assertEqual(self.credentials.signed, 5)
+        self.assertEqual(self.pool.get(*KEY), "token-2")
+        self.assertEqual((self.pool.hits, self.pool.misses), (1, 2))
+
+    def test_expired_tokens_are_not_handed_out(self):
+        self.pool.get(*KEY)
+        self.pool.get(*KEY)
+        self.pool._refill()
+        stale = time.time() - self.pool.max_age
+        self.pool.pools[KEY] = deque(
+            (token, stale) for token, _ in self.pool.pools[KEY]
+        )
+
+        self.assertEqual(self.pool.get(*KEY), "token-5")
+        self.assertEqual(self.pool.misses, 3)
+
+        self.pool.pools[KEY].append(("token-old", stale))
+        self.pool._refill()
+        self.assertEqual(
+            [token for token, _ in self.pool.pools[KEY]],
+            ["token-6", "token-7", "token-8"],
+        )
+
+    def test_idle_keys_are_forgotten(self):
+        self.pool.get(*KEY)
+        self.pool.get(*KEY)
+        self.pool.last_used[KEY] -= self.pool.idle_timeout + 1
+        self.pool._refill()
+
+        self.assertNotIn(KEY, self.pool.pools)
+        self.assertNotIn(KEY, self.pool.requests)
+        self.assertEqual(self.credentials.signed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import datetime
+import unittest
+
+from app.utils import Utils
+
+
+def reformat(last_update, last_update_dt):
+    return Utils._reformat_last_update(
+        {"LAST_UPDATE": last_update, "LAST_UPDATE_DT": last_update_dt}
+    )
+
+
+class ReformatLastUpdateTest(unittest.TestCase):
+    def test_date(self):
+        self.assertEqual(reformat("20240102", None), datetime.datetime(2024, 1, 2))
+
+    def test_time_on_update_date(self):
+        self.assertEqual(reformat("16:30:05", "2024-01-02"), "2024-01-02 16:30:05")
+
+    def test_date_and_time(self):
+        self.assertEqual(
+            reformat("2024-01-02 16:30:05", "2024-01-03"), "2024-01-02 16:30:05"
+        )
+
+    def test_unparseable(self):
+        self.assertIsNone(reformat("16:30", "2024-01-02"))
+
+    def test_without_last_update(self):
+        self.assertIsNone(reformat(None, None))
+        self.assertIsNone(reformat(None, "2024-01-02"))
+        self.assertIsNone(reformat(float("nan"), "2024-01-02"))
+
+
+if __name__ == "__main__":
+    unittest.main()